@@ -199,7 +199,19 @@ class TrafficCongestionDetector:
     
     def compute_speeds(self):
         """Compute speeds for all active tracks."""
-        for track in self.track_manager.get_active_tracks():
+        tracks = self.track_manager.get_active_tracks()
+        
+        # For homography, project the newest centroid of every track at once
+        # (previous positions come from each track's cached projection)
+        homography_speeds = {}
+        if self.speed_estimator_type == 'homography':
+            moving = [track for track in tracks if track.num_centroids >= 2]
+            if moving:
+                speeds = self.speed_estimator.track_speeds(moving)
+                homography_speeds = {track.track_id: float(speed)
+                                     for track, speed in zip(moving, speeds)}
+        
+        for track in tracks:
             # Get speed smoother for this track
             if track.track_id not in self.speed_smoothers:
                 self.speed_smoothers[track.track_id] = SpeedSmoother(
@@ -216,13 +228,8 @@ class TrafficCongestionDetector:
             if self.speed_estimator_type == 'pixel':
                 speed_real = self.speed_estimator.pixels_to_speed(speed_px)
             elif self.speed_estimator_type == 'homography':
-                # For homography, we need consecutive centroids
-                if len(track.centroids) >= 2:
-                    c1 = track.centroids[-2]
-                    c2 = track.centroids[-1]
-                    speed_real = self.speed_estimator.pixels_to_speed(c1, c2)
-                else:
-                    speed_real = 0.0
+                # Needs consecutive centroids; computed in one batch above
+                speed_real = homography_speeds.get(track.track_id, 0.0)
             else:
                 speed_real = speed_px
             
@@ -246,7 +253,9 @@ class TrafficCongestionDetector:
         metrics = self.congestion_detector.analyze(
             tracks=tracks,
             frame_idx=frame_idx,
-            fps=self.fps
+            fps=self.fps,
+            totals=self.track_manager.get_totals(
+                self.congestion_detector.stopped_threshold)
         )
         
         self.metrics_history.append(metrics)
@@ -287,11 +296,12 @@ class TrafficCongestionDetector:
         
         # Draw congestion overlay
         if show_metrics:
-            annotated = draw_congestion_overlay(
+            annotated = self.congestion_detector.draw_overlay(
                 annotated,
                 metrics,
                 position=(20, 40),
-                show_detailed=True
+                show_detailed=True,
+                inplace=True
             )
         
         # Add frame number
@@ -6,13 +6,67 @@ Supports batch processing and intelligent frame sampling.
 
 import cv2
 import os
+import sys
 import argparse
+import subprocess
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from tqdm import tqdm
 
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR
+    _turbo_jpeg = TurboJPEG()
+except (ImportError, RuntimeError, OSError):
+    # PyTurboJPEG or libjpeg-turbo not available - fall back to cv2.imencode
+    _turbo_jpeg = None
+
+# Make sure OpenCV's SIMD-optimized resize/encode kernels are enabled
+cv2.setUseOptimized(True)
+
+
+def resize_to_long_side(frame, target_long):
+    """
+    Downscale a frame so its longest side equals target_long.
+    
+    Args:
+        frame (np.ndarray): Input BGR frame
+        target_long (int): Target length of the longest side in pixels
+    
+    Returns:
+        np.ndarray: Resized frame (unchanged if already small enough)
+    """
+    h, w = frame.shape[:2]
+    scale = target_long / max(h, w)
+    if scale < 1:
+        frame = cv2.resize(frame, (int(w * scale), int(h * scale)),
+                           interpolation=cv2.INTER_AREA)
+    return frame
+
+
+def save_jpeg(path, frame, quality=95):
+    """
+    Encode a BGR frame as JPEG and write it to disk.
+    Uses libjpeg-turbo (PyTurboJPEG) when available, otherwise OpenCV.
+    
+    Args:
+        path (str): Output file path
+        frame (np.ndarray): BGR frame
+        quality (int): JPEG quality (0-100)
+    """
+    if _turbo_jpeg is not None:
+        data = _turbo_jpeg.encode(frame, quality=quality, pixel_format=TJPF_BGR)
+    else:
+        ok, data = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if not ok:
+            raise IOError(f"Could not encode frame for {path}")
+    with open(path, 'wb', buffering=1 << 20) as f:
+        f.write(data)
+
 
 def extract_frames(video_path, output_dir, fps=None, max_frames=None, 
-                   skip_frames=1, prefix="frame"):
+                   skip_frames=1, prefix="frame", resize_long=None,
+                   quiet=False):
     """
     Extract frames from a video file.
     
@@ -23,6 +77,10 @@ def extract_frames(video_path, output_dir, fps=None, max_frames=None,
         max_frames (int): Maximum number of frames to extract
         skip_frames (int): Extract every Nth frame (1 = all frames)
         prefix (str): Prefix for output filenames
+        resize_long (int): Downscale so the longest side is at most this many
+            pixels before saving (None = keep original resolution)
+        quiet (bool): Replace the progress bar with a plain print every
+            1000 frames (also used automatically when stdout is not a TTY)
     
     Returns:
         int: Number of frames extracted
@@ -48,48 +106,200 @@ def extract_frames(video_path, output_dir, fps=None, max_frames=None,
         skip_frames = max(1, int(video_fps / fps))
         print(f"Extracting at {fps} FPS (every {skip_frames} frames)")
     
-    frame_count = 0
+    # Frames left to skip before the next save (avoids a modulo per frame)
+    countdown = 0
     extracted_count = 0
     
-    # Progress bar
-    pbar = tqdm(total=min(total_frames // skip_frames, max_frames or float('inf')),
-                desc="Extracting frames")
+    # Progress bar (time-bounded refresh); plain periodic prints in batch jobs
+    target = min(total_frames // skip_frames, max_frames or float('inf'))
+    pbar = None
+    if not quiet and sys.stdout.isatty():
+        pbar = tqdm(total=target, desc="Extracting frames",
+                    mininterval=1.0, miniters=200)
     
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-        
-        # Check if we should extract this frame
-        if frame_count % skip_frames == 0:
-            # Save frame
-            frame_filename = f"{prefix}_{extracted_count:06d}.jpg"
-            frame_path = os.path.join(output_dir, frame_filename)
-            cv2.imwrite(frame_path, frame, [cv2.IMWRITE_JPEG_QUALITY, 95])
-            
-            extracted_count += 1
-            pbar.update(1)
-            
-            # Check max frames limit
-            if max_frames and extracted_count >= max_frames:
+    # Encode/write on worker threads so decoding of the next frame overlaps
+    # with JPEG encoding; at most 8 frames are kept in flight.
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=4) as writer:
+        while True:
+            # grab() advances without decoding; only frames we keep are retrieved
+            if not cap.grab():
                 break
+            
+            # Check if we should extract this frame
+            if countdown == 0:
+                countdown = skip_frames - 1
+                ret, frame = cap.retrieve()
+                if not ret:
+                    break
+                
+                if resize_long:
+                    frame = resize_to_long_side(frame, resize_long)
+                
+                # Save frame
+                frame_filename = f"{prefix}_{extracted_count:06d}.jpg"
+                frame_path = os.path.join(output_dir, frame_filename)
+                pending.append(writer.submit(save_jpeg, frame_path, frame, 95))
+                if len(pending) > 8:
+                    pending.popleft().result()
+                
+                extracted_count += 1
+                if pbar is not None:
+                    pbar.update(1)
+                elif extracted_count % 1000 == 0:
+                    print(f"  {extracted_count}/{target} frames", flush=True)
+                
+                # Check max frames limit
+                if max_frames and extracted_count >= max_frames:
+                    break
+            else:
+                countdown -= 1
         
-        frame_count += 1
+        for future in pending:
+            future.result()
     
-    pbar.close()
+    if pbar is not None:
+        pbar.close()
     cap.release()
     
     print(f"Extracted {extracted_count} frames to {output_dir}")
     return extracted_count
 
 
-def batch_extract(input_dir, output_base_dir, **kwargs):
+def probe_duration(video_path):
+    """
+    Get video duration in seconds using ffprobe.
+    
+    Args:
+        video_path (str): Path to input video
+    
+    Returns:
+        float: Duration in seconds
+    """
+    output = subprocess.check_output([
+        'ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+        '-of', 'csv=p=0', video_path
+    ], text=True)
+    return float(output.strip())
+
+
+def probe_frame_rate(video_path):
+    """
+    Get the average frame rate of the first video stream using ffprobe.
+    
+    Args:
+        video_path (str): Path to input video
+    
+    Returns:
+        float: Frames per second (0.0 if the container does not report one)
+    """
+    output = subprocess.check_output([
+        'ffprobe', '-v', 'error', '-select_streams', 'v:0',
+        '-show_entries', 'stream=avg_frame_rate', '-of', 'csv=p=0', video_path
+    ], text=True)
+    num, _, den = output.strip().partition('/')
+    try:
+        return float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return 0.0
+
+
+def extract_frames_parallel(video_path, output_dir, fps=None, max_frames=None,
+                            skip_frames=1, prefix="frame", resize_long=None,
+                            workers=4):
+    """
+    Extract frames by splitting the video timeline into chunks and running
+    one ffmpeg process per chunk. Each worker seeks to its chunk start
+    (demuxer seek, keyframe-accurate) so long videos decode in parallel.
+    
+    Args:
+        video_path (str): Path to input video
+        output_dir (str): Directory to save extracted frames
+        fps (float): Target FPS for extraction (None = video FPS / skip_frames)
+        max_frames (int): Maximum number of frames to extract
+        skip_frames (int): Extract every Nth frame (used when fps is None)
+        prefix (str): Prefix for output filenames
+        resize_long (int): Downscale so the longest side is at most this many
+            pixels (None = keep original resolution)
+        workers (int): Number of parallel ffmpeg processes
+    
+    Returns:
+        int: Number of frames extracted
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    
+    if fps is None:
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError(f"Cannot open video: {video_path}")
+        video_fps = cap.get(cv2.CAP_PROP_FPS)
+        cap.release()
+        
+        # Streams and some containers report no FPS to OpenCV
+        if video_fps <= 0:
+            video_fps = probe_frame_rate(video_path)
+        if video_fps <= 0:
+            print("Warning: video reports no frame rate, using sequential extraction")
+            return extract_frames(video_path, output_dir, max_frames=max_frames,
+                                  skip_frames=skip_frames, prefix=prefix,
+                                  resize_long=resize_long)
+        fps = video_fps / max(1, skip_frames)
+    
+    duration = probe_duration(video_path)
+    if max_frames:
+        duration = min(duration, max_frames / fps)
+    
+    chunk = duration / workers
+    print(f"Extracting {duration:.1f}s at {fps} FPS with {workers} ffmpeg workers")
+    
+    vf = f"fps={fps}"
+    if resize_long:
+        vf += (f",scale='if(gt(iw,ih),min({resize_long},iw),-2)'"
+               f":'if(gt(iw,ih),-2,min({resize_long},ih))'")
+    
+    # Launch one ffmpeg per chunk
+    processes = []
+    for i in range(workers):
+        cmd = [
+            'ffmpeg', '-v', 'error', '-y',
+            '-ss', f"{i * chunk:.3f}", '-i', video_path,
+            '-t', f"{chunk:.3f}", '-vf', vf, '-q:v', '2',
+            os.path.join(output_dir, f"{prefix}_part{i}_%06d.jpg")
+        ]
+        processes.append(subprocess.Popen(cmd))
+    
+    for i, process in enumerate(processes):
+        if process.wait() != 0:
+            print(f"Warning: ffmpeg worker {i} exited with code {process.returncode}")
+    
+    # Rename chunk outputs into one continuous sequence
+    extracted_count = 0
+    for i in range(workers):
+        part_prefix = f"{prefix}_part{i}_"
+        part_files = sorted(f for f in os.listdir(output_dir)
+                            if f.startswith(part_prefix))
+        for name in part_files:
+            src = os.path.join(output_dir, name)
+            if max_frames and extracted_count >= max_frames:
+                os.remove(src)
+                continue
+            dst = os.path.join(output_dir, f"{prefix}_{extracted_count:06d}.jpg")
+            os.replace(src, dst)
+            extracted_count += 1
+    
+    print(f"Extracted {extracted_count} frames to {output_dir}")
+    return extracted_count
+
+
+def batch_extract(input_dir, output_base_dir, workers=1, quiet=False, **kwargs):
     """
     Extract frames from multiple videos in a directory.
     
     Args:
         input_dir (str): Directory containing video files
         output_base_dir (str): Base directory for output
+        workers (int): ffmpeg workers per video (1 = OpenCV extraction)
+        quiet (bool): Disable progress bars for OpenCV extraction
         **kwargs: Arguments passed to extract_frames()
     """
     video_extensions = {'.mp4', '.avi', '.mov', '.mkv', '.flv', '.wmv'}
@@ -114,8 +324,13 @@ def batch_extract(input_dir, output_base_dir, **kwargs):
         print(f"{'='*60}")
         
         try:
-            extract_frames(str(video_file), output_dir, 
-                          prefix=video_name, **kwargs)
+            if workers > 1:
+                extract_frames_parallel(str(video_file), output_dir,
+                                        prefix=video_name, workers=workers,
+                                        **kwargs)
+            else:
+                extract_frames(str(video_file), output_dir, 
+                              prefix=video_name, quiet=quiet, **kwargs)
         except Exception as e:
             print(f"Error processing {video_file.name}: {e}")
 
@@ -136,20 +351,41 @@ def main():
                         help='Process all videos in input directory')
     parser.add_argument('--prefix', type=str, default='frame',
                         help='Prefix for output filenames')
+    parser.add_argument('--resize-long', type=int, default=None,
+                        help='Downscale frames so the longest side is at most N pixels '
+                             '(e.g. 640 to match training resolution)')
+    parser.add_argument('--quiet', action='store_true',
+                        help='Print progress every 1000 frames instead of a progress bar')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Split each video into N chunks extracted by parallel '
+                             'ffmpeg processes (default: 1 = OpenCV, no ffmpeg)')
     
     args = parser.parse_args()
     
     if args.batch:
         batch_extract(args.input, args.output, 
+                     workers=args.workers,
+                     quiet=args.quiet,
                      fps=args.fps, 
                      max_frames=args.max_frames,
-                     skip_frames=args.skip_frames)
+                     skip_frames=args.skip_frames,
+                     resize_long=args.resize_long)
+    elif args.workers > 1:
+        extract_frames_parallel(args.input, args.output,
+                               fps=args.fps,
+                               max_frames=args.max_frames,
+                               skip_frames=args.skip_frames,
+                               prefix=args.prefix,
+                               resize_long=args.resize_long,
+                               workers=args.workers)
     else:
         extract_frames(args.input, args.output,
                       fps=args.fps,
                       max_frames=args.max_frames,
                       skip_frames=args.skip_frames,
-                      prefix=args.prefix)
+                      prefix=args.prefix,
+                      resize_long=args.resize_long,
+                      quiet=args.quiet)
 
 
 if __name__ == "__main__":
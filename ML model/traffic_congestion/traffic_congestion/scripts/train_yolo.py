@@ -12,6 +12,12 @@ from ultralytics import YOLO
 import torch
 import yaml
 
+try:
+    # libyaml-backed loader/dumper (much faster than the pure-Python ones)
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
+
 
 def setup_training_environment():
     """Setup training environment and check GPU availability."""
@@ -188,15 +194,17 @@ def train_model(data_yaml, model_size='n', epochs=35, imgsz=640, batch=16,
     if data_path.exists():
         try:
             with open(data_path, 'r', encoding='utf-8') as fh:
-                cfg = yaml.safe_load(fh)
+                cfg = yaml.load(fh, Loader=SafeLoader)
 
             base = data_path.parent.resolve()
+            rewritten = False
 
             # Convert 'path' to absolute if present
             if isinstance(cfg, dict):
                 cfg_path = cfg.get('path', '.')
                 if not Path(cfg_path).is_absolute():
                     cfg['path'] = str(base)
+                    rewritten = True
 
                 # Ensure train/val entries are absolute
                 for k in ('train', 'val'):
@@ -204,13 +212,18 @@ def train_model(data_yaml, model_size='n', epochs=35, imgsz=640, batch=16,
                         p = Path(cfg[k])
                         if not p.is_absolute():
                             cfg[k] = str((base / cfg[k]).resolve())
+                            rewritten = True
 
-            # Write adjusted YAML to a temporary file and use it for training
-            tmpf = tempfile.NamedTemporaryFile(delete=False, suffix='.yaml')
-            with open(tmpf.name, 'w', encoding='utf-8') as fh:
-                yaml.safe_dump(cfg, fh)
-            tmp_data_file = tmpf.name
-            train_args['data'] = tmp_data_file
+            if rewritten:
+                # Write adjusted YAML to a temporary file and use it for training
+                tmpf = tempfile.NamedTemporaryFile(delete=False, suffix='.yaml')
+                with open(tmpf.name, 'w', encoding='utf-8') as fh:
+                    yaml.dump(cfg, fh, Dumper=SafeDumper)
+                tmp_data_file = tmpf.name
+                train_args['data'] = tmp_data_file
+            else:
+                # All paths already absolute - use the original file as-is
+                train_args['data'] = str(data_path)
         except Exception as e:
             print(f"Warning: couldn't rewrite data paths from {data_path}: {e}")
             train_args['data'] = str(data_path)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+test_train.py - Tests for the label validation cache in the training pipeline
+"""
+
+import os
+
+import pytest
+
+pytest.importorskip("ultralytics")
+from train import TrainingPipeline
+
+
+@pytest.fixture
+def pipeline(tmp_path):
+    pipeline = TrainingPipeline(base_dir=tmp_path)
+    for split in ("train", "val"):
+        (pipeline.labels_dir / split).mkdir(parents=True)
+    (pipeline.labels_dir / "train" / "a.txt").write_text("0 0.5 0.5 0.2 0.2\n")
+    (pipeline.labels_dir / "val" / "b.txt").write_text("9 0.5 0.5 0.2 0.2\n")
+    return pipeline
+
+
+def _count_scans(pipeline, monkeypatch):
+    """Count the label files validate_labels actually opens and checks."""
+    scanned = []
+    check = pipeline._check_label_file
+
+    def counting_check(label_path):
+        scanned.append(os.path.basename(label_path))
+        return check(label_path)
+
+    monkeypatch.setattr(pipeline, "_check_label_file", counting_check)
+    return scanned
+
+
+def test_second_validation_skips_scan(pipeline, monkeypatch):
+    scanned = _count_scans(pipeline, monkeypatch)
+
+    first = pipeline.validate_labels()
+    assert sorted(scanned) == ["a.txt", "b.txt"]
+    assert len(first) == 1
+
+    scanned.clear()
+    assert pipeline.validate_labels() == first
+    assert scanned == []
+
+
+def test_validation_cache_persists_across_runs(pipeline, monkeypatch):
+    first = pipeline.validate_labels()
+
+    rerun = TrainingPipeline(base_dir=pipeline.base_dir)
+    scanned = _count_scans(rerun, monkeypatch)
+    assert rerun.validate_labels() == first
+    assert scanned == []
+
+
+def test_changed_label_is_rescanned(pipeline, monkeypatch):
+    pipeline.validate_labels()
+    scanned = _count_scans(pipeline, monkeypatch)
+
+    (pipeline.labels_dir / "val" / "b.txt").write_text("1 0.5 0.5 0.2 0.2\n0 0.1 0.1 0.1 0.1\n")
+    assert pipeline.validate_labels() == []
+    assert scanned == ["b.txt"]
@@ -12,14 +12,163 @@ Features:
 import os
 import sys
 import cv2
+import json
+import errno
 import yaml
 import shutil
 import random
+import threading
 import argparse
+import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from tqdm import tqdm
 from ultralytics import YOLO
 
+# Progress-bar settings for loops whose body is a single rename/stat/read:
+# redraw at most every 0.5s and check the clock only every 100 iterations.
+_FAST_LOOP_TQDM = {"mininterval": 0.5, "miniters": 100}
+
+
+def _scan_suffix(directory, ext):
+    """
+    Return names of regular files in directory ending with ext (single scandir pass).
+    ext may be a tuple of suffixes, as accepted by str.endswith.
+    """
+    try:
+        with os.scandir(directory) as it:
+            return [e.name for e in it
+                    if e.name.endswith(ext) and e.is_file(follow_symlinks=False)]
+    except FileNotFoundError:
+        return []
+
+
+def _move_file(src, dst):
+    """
+    Move a file with a single rename; fall back to shutil.move across devices.
+    Callers pass str paths and create destination directories up front.
+    """
+    try:
+        os.replace(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(src, dst)
+
+
+def _write_jpeg(path, frame, quality=95):
+    """Encode frame to JPEG in memory and write the bytes with one buffered write."""
+    ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise IOError(f"Could not encode frame for {path}")
+    with open(path, "wb", buffering=1 << 20) as f:
+        f.write(buf)
+
+
+class LabelValidator:
+    """Checks YOLO label files against a fixed set of class IDs."""
+
+    def __init__(self, class_ids):
+        """
+        Args:
+            class_ids: Iterable of valid class IDs
+        """
+        # Read-only views of the class IDs used by the per-file checks
+        self._ids = frozenset(class_ids)
+        self._id_list = sorted(self._ids)
+        self._id_array = np.array(self._id_list, dtype=np.int64)
+
+    def check_file(self, label_path):
+        """
+        Validate a single YOLO label file. Empty files (no objects) are allowed.
+
+        Well-formed files are checked in one vectorized NumPy pass; files with
+        malformed lines fall back to the per-line checks for exact messages.
+
+        Returns:
+            list: Problem descriptions for this file
+        """
+        with open(label_path, "r", buffering=8192) as f:
+            lines = [ln for ln in (raw.strip() for raw in f) if ln]
+
+        if not lines:
+            return []
+
+        rows = [ln.split() for ln in lines]
+        if any(len(parts) != 5 for parts in rows):
+            return self.check_lines(label_path, lines)
+
+        try:
+            cids = np.array([parts[0] for parts in rows]).astype(np.int64)
+            coords = np.array([parts[1:] for parts in rows], dtype=np.float64)
+        except ValueError:
+            return self.check_lines(label_path, lines)
+
+        class_ok = np.isin(cids, self._id_array)
+        xy, wh = coords[:, :2], coords[:, 2:]
+        coords_ok = ((xy >= 0.0) & (xy <= 1.0) & (wh > 0.0) & (wh <= 1.0)).all(axis=1)
+
+        problems = []
+        for i in np.flatnonzero(~(class_ok & coords_ok)):
+            line_no = i + 1
+            if not class_ok[i]:
+                problems.append(
+                    f"{label_path} (line {line_no}): class id {cids[i]} not in {self._id_list}"
+                )
+            else:
+                x, y, w, h = coords[i].tolist()
+                problems.append(
+                    f"{label_path} (line {line_no}): invalid coords x={x}, y={y}, w={w}, h={h}"
+                )
+        return problems
+
+    def check_lines(self, label_path, lines):
+        """Per-line validation of stripped, non-empty label lines."""
+        problems = []
+        line_no = 0
+        for ln in lines:
+            line_no += 1
+            parts = ln.split()
+
+            # 1) column count
+            if len(parts) != 5:
+                problems.append(
+                    f"{label_path} (line {line_no}): expected 5 values, got {len(parts)} -> '{ln}'"
+                )
+                continue
+
+            # 2) class id
+            try:
+                cid = int(parts[0])
+            except ValueError:
+                problems.append(
+                    f"{label_path} (line {line_no}): class id is not int -> '{parts[0]}'"
+                )
+                continue
+
+            if cid not in self._ids:
+                problems.append(
+                    f"{label_path} (line {line_no}): class id {cid} not in {self._id_list}"
+                )
+                continue
+
+            # 3) coords
+            try:
+                x, y, w, h = map(float, parts[1:])
+            except ValueError:
+                problems.append(
+                    f"{label_path} (line {line_no}): could not parse coords -> {parts[1:]}"
+                )
+                continue
+
+            if not (0.0 <= x <= 1.0 and 0.0 <= y <= 1.0 and 0.0 < w <= 1.0 and 0.0 < h <= 1.0):
+                problems.append(
+                    f"{label_path} (line {line_no}): invalid coords x={x}, y={y}, w={w}, h={h}"
+                )
+
+        return problems
+
 
 class TrainingPipeline:
     """Complete training pipeline from videos to trained model."""
@@ -41,6 +190,17 @@ class TrainingPipeline:
             3: 'motorcycle',
             4: 'bicycle'
         }
+        # Read-only views of the class IDs used by the label scanning hot loops
+        self._class_ids = frozenset(self.class_names)
+        self._class_ids_list = sorted(self.class_names)
+        self._label_validator = LabelValidator(self.class_names)
+
+        # Per-file label scan results, persisted across runs and keyed by (mtime, size)
+        self.label_cache_path = self.dataset_dir / ".label_cache.json"
+        self._label_cache = None
+        self._label_cache_dirty = False
+        # Label reads run on a thread pool; guards the cache dict and dirty flag
+        self._label_cache_lock = threading.Lock()
     
     def setup_directories(self):
         """Create all necessary directories."""
@@ -62,9 +222,10 @@ class TrainingPipeline:
     
     def extract_frames(self, fps=2, max_frames=500):
         """Extract frames from videos for training."""
-        video_files = list(self.videos_dir.glob("*.mp4")) + \
-                     list(self.videos_dir.glob("*.avi")) + \
-                     list(self.videos_dir.glob("*.mov"))
+        cv2.setUseOptimized(True)  # ensure SIMD-optimized decode/encode paths
+        # One directory pass instead of a glob per extension
+        video_files = [self.videos_dir / name
+                       for name in _scan_suffix(self.videos_dir, (".mp4", ".avi", ".mov"))]
         
         if not video_files:
             print(f"❌ No videos found in {self.videos_dir}")
@@ -73,6 +234,7 @@ class TrainingPipeline:
         
         print(f"\n📹 Found {len(video_files)} video(s)")
         total_frames = 0
+        output_dir = os.fspath(self.images_dir / "train")
         
         for video_path in video_files:
             print(f"\nProcessing: {video_path.name}")
@@ -84,26 +246,39 @@ class TrainingPipeline:
             frame_skip = max(1, int(video_fps / fps))
             prefix = video_path.stem
             
-            frame_idx = 0
+            countdown = 0  # frames left to skip before the next save
             extracted = 0
             
             pbar = tqdm(total=min(total // frame_skip, max_frames), 
                        desc=f"  Extracting")
             
-            while cap.isOpened() and extracted < max_frames:
-                ret, frame = cap.read()
-                if not ret:
-                    break
+            # JPEG encode + write runs on worker threads (cv2 releases the GIL),
+            # overlapping with decoding of the next frames. retrieve() returns
+            # a fresh array each call, so frames can be handed off without a copy.
+            pending = deque()
+            with ThreadPoolExecutor(max_workers=4) as writer:
+                while cap.isOpened() and extracted < max_frames:
+                    # grab() only demuxes; decode happens in retrieve() for kept frames
+                    if not cap.grab():
+                        break
+                    
+                    if countdown == 0:
+                        countdown = frame_skip - 1
+                        ret, frame = cap.retrieve()
+                        if not ret:
+                            break
+                        output_path = os.path.join(
+                            output_dir, f"{prefix}_frame_{extracted:06d}.jpg")
+                        pending.append(writer.submit(_write_jpeg, output_path, frame))
+                        if len(pending) > 8:
+                            pending.popleft().result()  # bound frames held in memory
+                        extracted += 1
+                        pbar.update(1)
+                    else:
+                        countdown -= 1
                 
-                if frame_idx % frame_skip == 0:
-                    output_path = self.images_dir / "train" / \
-                                f"{prefix}_frame_{extracted:06d}.jpg"
-                    cv2.imwrite(str(output_path), frame, 
-                              [cv2.IMWRITE_JPEG_QUALITY, 95])
-                    extracted += 1
-                    pbar.update(1)
-                
-                frame_idx += 1
+                for future in pending:
+                    future.result()
             
             pbar.close()
             cap.release()
@@ -115,8 +290,8 @@ class TrainingPipeline:
     
     def check_labeling_status(self):
         """Check how many images have been labeled."""
-        train_images = list((self.images_dir / "train").glob("*.jpg"))
-        train_labels = list((self.labels_dir / "train").glob("*.txt"))
+        train_images = _scan_suffix(self.images_dir / "train", ".jpg")
+        train_labels = _scan_suffix(self.labels_dir / "train", ".txt")
         
         print("\n📊 Labeling Status:")
         print(f"   Images: {len(train_images)}")
@@ -137,44 +312,41 @@ class TrainingPipeline:
     
     def split_dataset(self, train_ratio=0.8):
         """Split dataset into train and validation sets."""
-        # Get all training images
-        train_images = list((self.images_dir / "train").glob("*.jpg"))
+        # Get all training images (file names only)
+        train_images = _scan_suffix(self.images_dir / "train", ".jpg")
         
         if not train_images:
             print("❌ No images found to split")
             return
         
-        # Get images that have labels
-        labeled_images = []
-        for img in train_images:
-            label_path = self.labels_dir / "train" / img.with_suffix('.txt').name
-            if label_path.exists():
-                labeled_images.append(img)
+        # Get images that have labels (one directory scan instead of a stat per image)
+        label_stems = {name[:-4] for name in _scan_suffix(self.labels_dir / "train", ".txt")}
+        labeled_images = [name for name in train_images if name[:-4] in label_stems]
         
         print(f"\n🔀 Splitting dataset:")
         print(f"   Total labeled images: {len(labeled_images)}")
         
-        # Shuffle
-        random.shuffle(labeled_images)
-        
-        # Split
+        # Split: randomly pick the validation images (no full shuffle needed)
         split_idx = int(len(labeled_images) * train_ratio)
-        val_images = labeled_images[split_idx:]
+        val_images = random.sample(labeled_images, len(labeled_images) - split_idx)
         
         print(f"   Training: {split_idx}")
         print(f"   Validation: {len(val_images)}")
         
-        # Move validation images and labels
-        for img_path in tqdm(val_images, desc="  Moving to val"):
-            # Move image
-            dest_img = self.images_dir / "val" / img_path.name
-            shutil.move(str(img_path), str(dest_img))
-            
-            # Move label
-            label_path = self.labels_dir / "train" / img_path.with_suffix('.txt').name
-            if label_path.exists():
-                dest_label = self.labels_dir / "val" / label_path.name
-                shutil.move(str(label_path), str(dest_label))
+        # Directories are created/resolved to str once; per-file paths use os.path.join
+        for d in (self.images_dir / "val", self.labels_dir / "val"):
+            d.mkdir(parents=True, exist_ok=True)
+        train_img_dir = os.fspath(self.images_dir / "train")
+        train_label_dir = os.fspath(self.labels_dir / "train")
+        val_img_dir = os.fspath(self.images_dir / "val")
+        val_label_dir = os.fspath(self.labels_dir / "val")
+        
+        # Move validation images and labels (every selected image has a label)
+        for name in tqdm(val_images, desc="  Moving to val", **_FAST_LOOP_TQDM):
+            _move_file(os.path.join(train_img_dir, name), os.path.join(val_img_dir, name))
+            label_name = name[:-4] + ".txt"
+            _move_file(os.path.join(train_label_dir, label_name),
+                       os.path.join(val_label_dir, label_name))
         
         print("✓ Dataset split complete")
     
@@ -190,13 +362,11 @@ class TrainingPipeline:
         - Fill remaining slots (if any) with random leftover images
         - Move all non-kept images + labels to *_unused folders
         """
-        train_dir = self.images_dir / "train"
-        val_dir = self.images_dir / "val"
-
-        train_images = list(train_dir.glob("*.jpg"))
-        val_images = list(val_dir.glob("*.jpg"))
-
-        all_images = train_images + val_images
+        # Images are kept as (split_name, file_name) string pairs; full paths
+        # are only built when a label is opened or a file is moved.
+        all_images = [(split, name)
+                      for split in ("train", "val")
+                      for name in _scan_suffix(self.images_dir / split, ".jpg")]
         total = len(all_images)
 
         if total == 0:
@@ -224,115 +394,206 @@ class TrainingPipeline:
 
         print(f"   Target images per class (approx): {target_per_class}")
 
-        # Build mapping: class_id -> list of images containing that class
+        # Label stems per split, so existence checks are set lookups instead of stats
+        label_stems = {
+            split: {name[:-4] for name in _scan_suffix(self.labels_dir / split, ".txt")}
+            for split in ("train", "val")
+        }
+        label_dirs = {split: os.fspath(self.labels_dir / split) for split in ("train", "val")}
+
+        # Build mapping: class_id -> indices (into all_images) of images containing that class
         class_to_images = {cid: [] for cid in self.class_names.keys()}
 
         print("\n🔍 Scanning labels to build class -> images mapping...")
-        for img in tqdm(all_images, desc="  Reading labels"):
-            split_name = img.parent.name  # "train" or "val"
-            label_path = self.labels_dir / split_name / img.with_suffix(".txt").name
-            if not label_path.exists():
-                continue
 
-            try:
-                with open(label_path, "r") as f:
-                    lines = [ln.strip() for ln in f.readlines() if ln.strip()]
-            except Exception:
-                continue
-
-            if not lines:
-                continue
-
-            # Collect unique class IDs present in this image
-            img_classes = set()
-            for ln in lines:
-                parts = ln.split()
-                if not parts:
-                    continue
-                try:
-                    cid = int(parts[0])
-                except ValueError:
-                    continue
-                if cid in self.class_names:
-                    img_classes.add(cid)
-
-            for cid in img_classes:
-                class_to_images[cid].append(img)
+        def parse_label(img):
+            split_name, name = img
+            stem = name[:-4]
+            if stem not in label_stems[split_name]:
+                return ()
+            return self._read_label_classes(os.path.join(label_dirs[split_name], stem + ".txt"))
+
+        # Label reads are I/O-bound; overlap them with a thread pool
+        max_workers = min(32, (os.cpu_count() or 1) * 4)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(parse_label, all_images)
+            for idx, img_classes in enumerate(
+                    tqdm(results, total=total, desc="  Reading labels", **_FAST_LOOP_TQDM)):
+                for cid in img_classes:
+                    class_to_images[cid].append(idx)
 
         # Report class distribution
         print("\n📊 Class distribution (images containing class):")
         for cid, imgs in class_to_images.items():
             print(f"   Class {cid} ({self.class_names[cid]}): {len(imgs)} images")
 
-        # Select images per class
-        selected_images = set()
+        # Select images per class. Selection is a boolean mask over all_images
+        # indices, so union/size/difference never hash Path objects.
+        selected = np.zeros(total, dtype=bool)
         print("\n🎯 Selecting balanced subset of images per class...")
         for cid, imgs in class_to_images.items():
             if not imgs:
                 print(f"   ⚠️ Class {cid} ({self.class_names[cid]}) has 0 images with labels.")
                 continue
 
-            imgs_shuffled = imgs[:]
-            random.shuffle(imgs_shuffled)
-            take = min(target_per_class, len(imgs_shuffled))
-            chosen = imgs_shuffled[:take]
+            take = min(target_per_class, len(imgs))
+            chosen = random.sample(imgs, take)
 
-            selected_images.update(chosen)
+            selected[chosen] = True
             print(f"   Class {cid} ({self.class_names[cid]}): selected {take} images")
 
         # If we selected more than max_images due to overlap, downsample
-        selected_list = list(selected_images)
-        if len(selected_list) > max_images:
-            random.shuffle(selected_list)
-            selected_list = selected_list[:max_images]
-            selected_images = set(selected_list)
+        selected_count = int(selected.sum())
+        if selected_count > max_images:
+            keep = random.sample(np.flatnonzero(selected).tolist(), max_images)
+            selected[:] = False
+            selected[keep] = True
+            selected_count = max_images
 
         # If fewer than max_images, fill with random remaining images
-        if len(selected_images) < max_images:
-            remaining_needed = max_images - len(selected_images)
-            remaining_images = list(set(all_images) - selected_images)
-            random.shuffle(remaining_images)
-            fill = remaining_images[:remaining_needed]
-            selected_images.update(fill)
+        if selected_count < max_images:
+            remaining_needed = max_images - selected_count
+            remaining = np.flatnonzero(~selected).tolist()
+            fill = random.sample(remaining, min(remaining_needed, len(remaining)))
+            selected[fill] = True
+            selected_count += len(fill)
             print(f"\n➕ Filled remaining slots with {len(fill)} random images.")
         
-        print(f"\n✅ Final balanced subset size: {len(selected_images)} images")
-
-        # Prepare unused directories
-        unused_images_train = self.dataset_dir / "images_unused" / "train"
-        unused_images_val = self.dataset_dir / "images_unused" / "val"
-        unused_labels_train = self.dataset_dir / "labels_unused" / "train"
-        unused_labels_val = self.dataset_dir / "labels_unused" / "val"
-
-        for d in [unused_images_train, unused_images_val, unused_labels_train, unused_labels_val]:
-            d.mkdir(parents=True, exist_ok=True)
+        print(f"\n✅ Final balanced subset size: {selected_count} images")
+
+        # Prepare unused directories once; per split:
+        # (image dir, label dir, unused image dir, unused label dir)
+        move_dirs = {}
+        for split in ("train", "val"):
+            unused_images = self.dataset_dir / "images_unused" / split
+            unused_labels = self.dataset_dir / "labels_unused" / split
+            for d in (unused_images, unused_labels):
+                d.mkdir(parents=True, exist_ok=True)
+            move_dirs[split] = (os.fspath(self.images_dir / split),
+                                os.fspath(self.labels_dir / split),
+                                os.fspath(unused_images), os.fspath(unused_labels))
 
         # Move non-selected images and corresponding labels
-        to_remove = [img for img in all_images if img not in selected_images]
+        to_remove = [all_images[i] for i in np.flatnonzero(~selected)]
         print(f"\n🧹 Moving {len(to_remove)} unused images to *_unused folders...")
-        for img in tqdm(to_remove, desc="  Moving unused images"):
-            split_name = img.parent.name  # "train" or "val"
-            if split_name == "train":
-                dest_img = unused_images_train / img.name
-                src_label = self.labels_dir / "train" / img.with_suffix(".txt").name
-                dest_label = unused_labels_train / src_label.name
-            else:
-                dest_img = unused_images_val / img.name
-                src_label = self.labels_dir / "val" / img.with_suffix(".txt").name
-                dest_label = unused_labels_val / src_label.name
+        for split_name, name in tqdm(to_remove, desc="  Moving unused images",
+                                     **_FAST_LOOP_TQDM):
+            img_dir, label_dir, unused_img_dir, unused_label_dir = move_dirs[split_name]
 
-            # Move image
-            shutil.move(str(img), str(dest_img))
+            # Move image and its label back-to-back (same directories stay hot)
+            _move_file(os.path.join(img_dir, name), os.path.join(unused_img_dir, name))
+            stem = name[:-4]
+            if stem in label_stems[split_name]:
+                label_name = stem + ".txt"
+                _move_file(os.path.join(label_dir, label_name),
+                           os.path.join(unused_label_dir, label_name))
 
-            # Move label if exists
-            if src_label.exists():
-                shutil.move(str(src_label), str(dest_label))
+        self._save_label_cache()
 
         print(f"\n✓ Balanced dataset limiting complete.")
-        print(f"  Kept images: {len(selected_images)}")
+        print(f"  Kept images: {selected_count}")
         print(f"  Unused images moved to: {self.dataset_dir / 'images_unused'}")
         print(f"  Unused labels moved to: {self.dataset_dir / 'labels_unused'}")
 
+    def _load_label_cache(self):
+        """Return the label cache entries, loading them from disk on first use."""
+        if self._label_cache is None:
+            entries = {}
+            try:
+                with open(self.label_cache_path, "r") as f:
+                    data = json.load(f)
+                # Results depend on the class list; drop the cache if it changed
+                if data.get("classes") == self._class_ids_list:
+                    entries = data.get("files", {})
+            except (OSError, ValueError, AttributeError):
+                pass
+            self._label_cache = entries
+        return self._label_cache
+
+    def _save_label_cache(self):
+        """Write the label cache back to disk, dropping entries for moved/deleted files."""
+        with self._label_cache_lock:
+            if not self._label_cache_dirty:
+                return
+            files = {path: entry for path, entry in self._label_cache.items()
+                     if os.path.exists(path)}
+            try:
+                tmp_path = os.fspath(self.label_cache_path) + ".tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump({"classes": self._class_ids_list, "files": files}, f)
+                os.replace(tmp_path, self.label_cache_path)
+                self._label_cache = files
+                self._label_cache_dirty = False
+            except OSError as e:
+                print(f"⚠️ Could not write label cache: {e}")
+
+    def _cached_label_result(self, label_path, key, compute):
+        """
+        Return compute(label_path), reusing the cached value for key while the
+        file's mtime and size are unchanged.
+        """
+        try:
+            st = os.stat(label_path)
+        except OSError:
+            return compute(label_path)
+
+        path = os.fspath(label_path)
+        with self._label_cache_lock:
+            files = self._load_label_cache()
+            entry = files.get(path)
+            if entry is None or entry["mtime"] != st.st_mtime_ns or entry["size"] != st.st_size:
+                entry = {"mtime": st.st_mtime_ns, "size": st.st_size}
+                files[path] = entry
+            elif key in entry:
+                return entry[key]
+
+        # Parse outside the lock so reads on the pool's other threads overlap
+        value = compute(label_path)
+        with self._label_cache_lock:
+            entry[key] = value
+            self._label_cache_dirty = True
+        return value
+
+    def _read_label_classes(self, label_path):
+        """Return the set of known class IDs present in a YOLO label file (cached)."""
+        return set(self._cached_label_result(
+            label_path, "class_ids", lambda p: sorted(self._parse_label_classes(p))))
+
+    def _parse_label_classes(self, label_path):
+        """Parse a YOLO label file and return the set of known class IDs present."""
+        try:
+            with open(label_path, "r") as f:
+                lines = [ln.strip() for ln in f.readlines() if ln.strip()]
+        except Exception:
+            return set()
+
+        img_classes = set()
+        for ln in lines:
+            parts = ln.split()
+            if not parts:
+                continue
+            try:
+                cid = int(parts[0])
+            except ValueError:
+                continue
+            if cid in self._class_ids:
+                img_classes.add(cid)
+
+        return img_classes
+
+    def _validate_label_file(self, label_path):
+        """Return the problems found in a single YOLO label file (cached)."""
+        return self._cached_label_result(label_path, "problems", self._check_label_file)
+
+    def _check_label_file(self, label_path):
+        """
+        Validate a single YOLO label file (see LabelValidator.check_file).
+
+        Returns:
+            list: Problem descriptions for this file
+        """
+        return self._label_validator.check_file(label_path)
+
     def validate_labels(self):
         """
         Validate YOLO label files to catch common issues:
@@ -343,59 +604,10 @@ class TrainingPipeline:
         print("\n🔍 Validating label files...")
 
         problems = []
-        for split in ["train", "val"]:
-            label_dir = self.labels_dir / split
-            if not label_dir.exists():
-                continue
+        for label_path in self._label_file_paths():
+            problems.extend(self._validate_label_file(label_path))
 
-            for label_path in label_dir.glob("*.txt"):
-                with open(label_path, "r") as f:
-                    lines = [ln.strip() for ln in f.readlines() if ln.strip()]
-
-                if not lines:
-                    # Empty label file (no objects) is allowed
-                    continue
-
-                line_no = 0
-                for ln in lines:
-                    line_no += 1
-                    parts = ln.split()
-
-                    # 1) column count
-                    if len(parts) != 5:
-                        problems.append(
-                            f"{label_path} (line {line_no}): expected 5 values, got {len(parts)} -> '{ln}'"
-                        )
-                        continue
-
-                    # 2) class id
-                    try:
-                        cid = int(parts[0])
-                    except ValueError:
-                        problems.append(
-                            f"{label_path} (line {line_no}): class id is not int -> '{parts[0]}'"
-                        )
-                        continue
-
-                    if cid not in self.class_names:
-                        problems.append(
-                            f"{label_path} (line {line_no}): class id {cid} not in {list(self.class_names.keys())}"
-                        )
-                        continue
-
-                    # 3) coords
-                    try:
-                        x, y, w, h = map(float, parts[1:])
-                    except ValueError:
-                        problems.append(
-                            f"{label_path} (line {line_no}): could not parse coords -> {parts[1:]}"
-                        )
-                        continue
-
-                    if not (0.0 <= x <= 1.0 and 0.0 <= y <= 1.0 and 0.0 < w <= 1.0 and 0.0 < h <= 1.0):
-                        problems.append(
-                            f"{label_path} (line {line_no}): invalid coords x={x}, y={y}, w={w}, h={h}"
-                        )
+        self._save_label_cache()
 
         if not problems:
             print("✅ All labels look OK.")
@@ -408,6 +620,15 @@ class TrainingPipeline:
 
         return problems
     
+    def _label_file_paths(self):
+        """Return str paths of all train/val label files."""
+        paths = []
+        for split in ("train", "val"):
+            label_dir = os.fspath(self.labels_dir / split)
+            paths.extend(os.path.join(label_dir, name)
+                         for name in _scan_suffix(label_dir, ".txt"))
+        return paths
+
     def create_data_yaml(self):
         """Create YOLO dataset configuration."""
         config = {
@@ -426,11 +647,17 @@ class TrainingPipeline:
         return yaml_path
     
     def train_model(self, model_size='n', epochs=100, batch=16,
-                    device='auto', imgsz=640, workers=4):
-        """Train YOLO model with Apple Silicon / GPU-friendly defaults."""
+                    device='auto', imgsz=640, workers=4, cache=False):
+        """
+        Train YOLO model with Apple Silicon / GPU-friendly defaults.
+
+        cache: False, 'ram' or 'disk'. Caches decoded uint8 frames so the
+        dataloader skips JPEG decoding every epoch; batches are already
+        collated as NCHW uint8 tensors in pinned host memory by Ultralytics.
+        """
         import torch  # local import to avoid issues if torch isn't installed
 
-        # Validate labels before training
+        # Validate labels before training (unchanged files come from the label cache)
         issues = self.validate_labels()
         if issues:
             print("\n❌ Label validation failed. Fix the issues above and rerun training.")
@@ -467,7 +694,8 @@ class TrainingPipeline:
         print(f"   Batch size: {batch}")
         print(f"   Image size: {imgsz}")
         print(f"   Device: {device}")
-        print(f"   DataLoader workers: {workers}\n")
+        print(f"   DataLoader workers: {workers}")
+        print(f"   Image cache: {cache or 'off'}\n")
 
         # Load model
         model = YOLO(models[model_size])
@@ -480,6 +708,7 @@ class TrainingPipeline:
             batch=batch,
             device=device,
             workers=workers,          # use multiple workers for data loading
+            cache=cache,              # pre-decoded frames (ram/disk) skip per-epoch JPEG decode
             project=str(self.models_dir / "training"),
             name='traffic_model',
             exist_ok=True,
@@ -569,6 +798,9 @@ Examples:
                        help='Device: auto, mps, cuda, cpu (default: auto)')
     parser.add_argument('--workers', type=int, default=4,
                        help='Number of dataloader workers (default: 4)')
+    parser.add_argument('--cache', type=str, default=None,
+                       choices=['ram', 'disk'],
+                       help='Cache decoded training images in RAM or on disk (default: off)')
     parser.add_argument('--max-images', type=int, default=10000,
                        help='Maximum total images (train+val) to keep in balanced subset (default: 10000)')
     
@@ -626,7 +858,8 @@ Examples:
             batch=args.batch,
             device=args.device,   # 'auto' by default
             imgsz=args.imgsz,
-            workers=args.workers
+            workers=args.workers,
+            cache=args.cache or False
         )
         
         print(f"\n✅ Training complete!")
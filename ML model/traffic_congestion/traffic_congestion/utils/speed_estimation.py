@@ -3,10 +3,22 @@ Speed estimation utilities for traffic analysis.
 Implements both simple pixel-based and accurate homography-based methods.
 """
 
+import itertools
+import math
+from array import array
+
 import numpy as np
 import cv2
 from typing import List, Tuple, Optional, Dict
-from collections import deque
+
+
+def _dot_stencil(radius: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Pixel offsets (dy, dx) covered by a filled cv2.circle of the given radius."""
+    size = 2 * radius + 1
+    canvas = np.zeros((size, size), dtype=np.uint8)
+    cv2.circle(canvas, (radius, radius), radius, 255, -1)
+    dy, dx = np.nonzero(canvas)
+    return (dy - radius).astype(np.int32), (dx - radius).astype(np.int32)
 
 
 class SpeedEstimator:
@@ -94,6 +106,14 @@ class HomographySpeedEstimator(SpeedEstimator):
     Maps image coordinates to real-world coordinates.
     """
     
+    # Centroid moves shorter than this (in pixels) are detection jitter and
+    # report 0 km/h without projecting the points
+    MIN_PIXEL_MOTION = 1.0
+    
+    # Source of calibration ids; unique across estimators, so a track's cached
+    # world position is never reused under a different homography
+    _calibration_ids = itertools.count(1)
+    
     def __init__(self, fps: float = 30.0,
                  image_points: Optional[np.ndarray] = None,
                  world_points: Optional[np.ndarray] = None):
@@ -107,6 +127,18 @@ class HomographySpeedEstimator(SpeedEstimator):
         """
         super().__init__(fps)
         self.homography_matrix = None
+        self.calibration_id = 0
+        
+        # Calibration-only caches for draw_world_grid
+        self._inv_H = None
+        self._grid_world = None
+        self._grid_key = None
+        self._dot_offsets = None
+        
+        # Remap tables for frame-wide warps (see build_remap)
+        self._map_x = None
+        self._map_y = None
+        self._map_key = None
         
         if image_points is not None and world_points is not None:
             self.compute_homography(image_points, world_points)
@@ -137,14 +169,30 @@ class HomographySpeedEstimator(SpeedEstimator):
                 [10, 20],    # Corner
             ], dtype=np.float32)
         """
-        image_points = np.array(image_points, dtype=np.float32)
-        world_points = np.array(world_points, dtype=np.float32)
+        image_points = np.ascontiguousarray(image_points, dtype=np.float32)
+        world_points = np.ascontiguousarray(world_points, dtype=np.float32)
         
         # Compute homography matrix
         self.homography_matrix, _ = cv2.findHomography(
             image_points, world_points, cv2.RANSAC
         )
         
+        # perspectiveTransform evaluates the matrix in double precision, so keep
+        # it contiguous float64 to avoid a conversion on every call
+        if self.homography_matrix is not None:
+            self.homography_matrix = np.ascontiguousarray(self.homography_matrix,
+                                                          dtype=np.float64)
+        
+        # Invalidate everything derived from the previous calibration
+        self.calibration_id = next(self._calibration_ids)
+        self._inv_H = (np.linalg.inv(self.homography_matrix)
+                       if self.homography_matrix is not None else None)
+        self._grid_world = None
+        self._grid_key = None
+        self._map_x = None
+        self._map_y = None
+        self._map_key = None
+        
         print("Homography matrix computed successfully")
         print(self.homography_matrix)
     
@@ -186,8 +234,7 @@ class HomographySpeedEstimator(SpeedEstimator):
         world2 = self.image_to_world(point2)
         
         # Euclidean distance
-        distance = np.sqrt((world2[0] - world1[0])**2 + 
-                          (world2[1] - world1[1])**2)
+        distance = math.hypot(world2[0] - world1[0], world2[1] - world1[1])
         
         return distance
     
@@ -203,6 +250,12 @@ class HomographySpeedEstimator(SpeedEstimator):
         Returns:
             float: Speed in km/h
         """
+        # Sub-pixel motion: treat as stationary and skip the projection
+        dx = centroid2[0] - centroid1[0]
+        dy = centroid2[1] - centroid1[1]
+        if dx * dx + dy * dy < self.MIN_PIXEL_MOTION * self.MIN_PIXEL_MOTION:
+            return 0.0
+        
         # Compute world distance
         distance_meters = self.compute_world_distance(centroid1, centroid2)
         
@@ -214,6 +267,143 @@ class HomographySpeedEstimator(SpeedEstimator):
         
         return speed_kmh
     
+    def pixels_to_speed_batch(self, prev_xy: np.ndarray,
+                              cur_xy: np.ndarray) -> np.ndarray:
+        """
+        Compute speeds for many tracks with a single perspective transform.
+        
+        Args:
+            prev_xy (np.ndarray): Previous positions [N, 2] in image coords
+            cur_xy (np.ndarray): Current positions [N, 2] in image coords
+        
+        Returns:
+            np.ndarray: Speeds in km/h [N]
+        """
+        if self.homography_matrix is None:
+            raise ValueError("Homography matrix not computed. Call compute_homography first.")
+        
+        prev_xy = np.asarray(prev_xy, dtype=np.float64).reshape(-1, 2)
+        cur_xy = np.asarray(cur_xy, dtype=np.float64).reshape(-1, 2)
+        speeds = np.zeros(len(prev_xy), dtype=np.float64)
+        
+        # Only project tracks that moved at least MIN_PIXEL_MOTION pixels
+        delta = cur_xy - prev_xy
+        moving = np.flatnonzero(
+            np.einsum('ij,ij->i', delta, delta) >= self.MIN_PIXEL_MOTION * self.MIN_PIXEL_MOTION
+        )
+        n = len(moving)
+        if n == 0:
+            return speeds
+        
+        # Stack as (N, 2 points, 2 coords) -> one (2N, 1, 2) transform
+        points = np.empty((n, 2, 2), dtype=np.float32)
+        points[:, 0] = prev_xy[moving]
+        points[:, 1] = cur_xy[moving]
+        world = cv2.perspectiveTransform(
+            points.reshape(-1, 1, 2), self.homography_matrix
+        ).reshape(n, 2, 2).astype(np.float64)
+        
+        distance_meters = np.linalg.norm(world[:, 1] - world[:, 0], axis=1)
+        
+        # Distance per frame -> distance per second -> km/h
+        speeds[moving] = distance_meters * self.fps * 3.6
+        return speeds
+    
+    def track_speeds(self, tracks: List) -> np.ndarray:
+        """
+        Compute speeds for tracks from their last two centroids, reusing each
+        track's cached world position of its previous centroid.
+        
+        On steady-state tracks only the newest centroid is projected; the
+        previous one was projected on the last call and cached on the track.
+        
+        Args:
+            tracks (list): VehicleTrack objects with at least 2 centroids
+        
+        Returns:
+            np.ndarray: Speeds in km/h [N]
+        """
+        if self.homography_matrix is None:
+            raise ValueError("Homography matrix not computed. Call compute_homography first.")
+        
+        n = len(tracks)
+        if n == 0:
+            return np.zeros(0, dtype=np.float64)
+        
+        last_two = np.array([track.recent_centroids(2) for track in tracks])
+        
+        # Previous positions cached at each track's previous detection under
+        # the current homography
+        calibration = self.calibration_id
+        cached = [track.cached_world_position(calibration) for track in tracks]
+        missing = [i for i, entry in enumerate(cached) if entry is None]
+        
+        # Project all current centroids plus the uncached previous ones at once
+        points = np.concatenate([last_two[:, 1], last_two[missing, 0]])
+        world = cv2.perspectiveTransform(
+            points.astype(np.float32).reshape(-1, 1, 2), self.homography_matrix
+        ).reshape(-1, 2).astype(np.float64)
+        cur_world = world[:n]
+        
+        prev_world = np.empty((n, 2), dtype=np.float64)
+        for i, entry in enumerate(cached):
+            if entry is not None:
+                prev_world[i] = entry
+        prev_world[missing] = world[n:]
+        
+        for track, (wx, wy) in zip(tracks, cur_world.tolist()):
+            track.cache_world_position(calibration, wx, wy)
+        
+        # Distance per frame -> distance per second -> km/h; sub-pixel
+        # moves are jitter and report 0
+        delta = last_two[:, 1] - last_two[:, 0]
+        moving = np.einsum('ij,ij->i', delta, delta) >= self.MIN_PIXEL_MOTION * self.MIN_PIXEL_MOTION
+        distance_meters = np.linalg.norm(cur_world - prev_world, axis=1)
+        return np.where(moving, distance_meters * self.fps * 3.6, 0.0)
+    
+    def build_remap(self, src_size: Tuple[int, int], dst_size: Tuple[int, int],
+                    matrix: Optional[np.ndarray] = None):
+        """
+        Precompute remap tables so each frame warp is a single cv2.remap.
+        
+        Args:
+            src_size (tuple): Source frame size (width, height)
+            dst_size (tuple): Output size (width, height)
+            matrix (np.ndarray): 3x3 warp matrix (defaults to the homography)
+        """
+        if matrix is None:
+            if self.homography_matrix is None:
+                raise ValueError("Homography matrix not computed. Call compute_homography first.")
+            matrix = self.homography_matrix
+        
+        # With identity camera matrices and no distortion, the maps sample
+        # src at matrix^-1 * dst, i.e. exactly what warpPerspective does
+        eye = np.eye(3)
+        self._map_x, self._map_y = cv2.initUndistortRectifyMap(
+            eye, None, np.asarray(matrix, dtype=np.float64), eye,
+            tuple(dst_size), cv2.CV_32FC1
+        )
+        self._map_key = (tuple(src_size), tuple(dst_size))
+    
+    def warp_frame(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Warp a frame with the tables from build_remap.
+        
+        Args:
+            frame (np.ndarray): Input frame of the size given to build_remap
+        
+        Returns:
+            np.ndarray: Warped frame
+        """
+        if self._map_x is None:
+            raise ValueError("Remap tables not built. Call build_remap first.")
+        
+        src_size = (frame.shape[1], frame.shape[0])
+        if src_size != self._map_key[0]:
+            raise ValueError(f"Frame size {src_size} does not match remap source size {self._map_key[0]}")
+        
+        return cv2.remap(frame, self._map_x, self._map_y, cv2.INTER_LINEAR)
+    
     def draw_world_grid(self, frame: np.ndarray, 
                        grid_spacing: float = 5.0,
                        max_distance: float = 50.0,
@@ -237,24 +427,33 @@ class HomographySpeedEstimator(SpeedEstimator):
         
         annotated = frame.copy()
         
-        # Generate world grid points
-        world_points = []
-        for x in np.arange(0, max_distance, grid_spacing):
-            for y in np.arange(0, max_distance, grid_spacing):
-                world_points.append([x, y])
-        
-        world_points = np.array(world_points, dtype=np.float32).reshape(-1, 1, 2)
+        # World grid points depend only on the grid parameters; build them once
+        grid_key = (grid_spacing, max_distance)
+        if self._grid_world is None or self._grid_key != grid_key:
+            self._grid_world = np.mgrid[
+                0:max_distance:grid_spacing, 0:max_distance:grid_spacing
+            ].reshape(2, -1).T.reshape(-1, 1, 2).astype(np.float32)
+            self._grid_key = grid_key
         
-        # Transform to image coordinates
-        inv_homography = np.linalg.inv(self.homography_matrix)
-        image_points = cv2.perspectiveTransform(world_points, inv_homography)
+        # Transform to image coordinates (inverse cached in compute_homography)
+        if self._inv_H is None:
+            self._inv_H = np.linalg.inv(self.homography_matrix)
+        image_points = cv2.perspectiveTransform(self._grid_world, self._inv_H)
         
-        # Draw grid
+        # Draw grid: keep in-bounds points, then scatter a radius-3 dot stencil
         h, w = frame.shape[:2]
-        for point in image_points:
-            x, y = point[0]
-            if 0 <= x < w and 0 <= y < h:
-                cv2.circle(annotated, (int(x), int(y)), 3, color, -1)
+        pts = image_points.reshape(-1, 2)
+        mask = (pts[:, 0] >= 0) & (pts[:, 0] < w) & (pts[:, 1] >= 0) & (pts[:, 1] < h)
+        xs = pts[mask, 0].astype(np.int32)
+        ys = pts[mask, 1].astype(np.int32)
+        
+        if self._dot_offsets is None:
+            self._dot_offsets = _dot_stencil(3)
+        dy, dx = self._dot_offsets
+        yy = (ys[:, None] + dy).ravel()
+        xx = (xs[:, None] + dx).ravel()
+        inside = (xx >= 0) & (xx < w) & (yy >= 0) & (yy < h)
+        annotated[yy[inside], xx[inside]] = color
         
         return annotated
 
@@ -273,7 +472,24 @@ class SpeedSmoother:
         """
         self.window_size = window_size
         self.outlier_threshold = outlier_threshold
-        self.speed_history = deque(maxlen=window_size)
+        
+        # Ring buffer of the last window_size speeds with running sums of
+        # (speed - shift) and its square, so mean/std are O(1) per sample.
+        # Shifting by a recent mean keeps the variance formula from cancelling.
+        # array('d') stores unboxed C doubles, so many smoothers stay compact.
+        self._buf = array('d', [0.0]) * window_size
+        self._n = 0
+        self._head = 0
+        self._shift = 0.0
+        self._sum = 0.0
+        self._sumsq = 0.0
+    
+    @property
+    def speed_history(self) -> List[float]:
+        """Speeds currently in the window, oldest first."""
+        if self._n < self.window_size:
+            return self._buf[:self._n].tolist()
+        return (self._buf[self._head:] + self._buf[:self._head]).tolist()
     
     def add_speed(self, speed: float) -> float:
         """
@@ -285,26 +501,61 @@ class SpeedSmoother:
         Returns:
             float: Smoothed speed
         """
+        n = self._n
+        shift = self._shift
+        
         # Remove outliers using z-score
-        if len(self.speed_history) > 2:
-            mean = np.mean(self.speed_history)
-            std = np.std(self.speed_history)
+        if n > 2:
+            mean_dev = self._sum / n
+            msq = self._sumsq / n
+            var = msq - mean_dev * mean_dev
             
-            if std > 0:
-                z_score = abs((speed - mean) / std)
-                if z_score > self.outlier_threshold:
+            # z-score test on squares (no sqrt/abs/division). A constant history
+            # has zero std and filters nothing; its running variance may hold
+            # rounding noise instead, so that case checks the values themselves
+            mean = shift + mean_dev
+            d = speed - mean
+            threshold = self.outlier_threshold
+            if d * d > threshold * threshold * var:
+                values = self._buf[:n]
+                if min(values) != max(values):
                     # Outlier detected, use previous mean
                     speed = mean
         
-        # Add to history
-        self.speed_history.append(speed)
+        speed = float(speed)
+        
+        # Add to history, evicting the oldest value once the window is full
+        head = self._head
+        if n == self.window_size:
+            old = self._buf[head] - shift
+            self._sum -= old
+            self._sumsq -= old * old
+        else:
+            self._n = n = n + 1
+        self._buf[head] = speed
+        dev = speed - shift
+        self._sum += dev
+        self._sumsq += dev * dev
+        self._head = head = (head + 1) % self.window_size
+        
+        # Once per lap of the buffer, re-center on the current mean and
+        # recompute the sums exactly (bounds drift and cancellation)
+        if head == 0:
+            values = self._buf[:n]
+            self._shift = shift = sum(values) / n
+            self._sum = sum(v - shift for v in values)
+            self._sumsq = sum((v - shift) * (v - shift) for v in values)
         
         # Return moving average
-        return np.mean(self.speed_history)
+        return shift + self._sum / n
     
     def reset(self):
         """Reset speed history."""
-        self.speed_history.clear()
+        self._n = 0
+        self._head = 0
+        self._shift = 0.0
+        self._sum = 0.0
+        self._sumsq = 0.0
 
 
 def setup_homography_interactive(frame: np.ndarray,
@@ -355,14 +606,15 @@ def setup_homography_interactive(frame: np.ndarray,
     
     # Define world coordinates
     width, height = real_world_dims
-    world_points = np.array([
+    world_points = np.ascontiguousarray([
         [0, 0],
         [width, 0],
         [0, height],
         [width, height],
     ], dtype=np.float32)
     
-    image_points = np.array(points, dtype=np.float32)
+    # Contiguous float32 points pass through compute_homography without a copy
+    image_points = np.ascontiguousarray(points, dtype=np.float32)
     
     # Create estimator
     estimator = HomographySpeedEstimator(
@@ -3,14 +3,183 @@ Vehicle tracking utilities for maintaining track history and computing metrics.
 Implements track management, centroid calculation, and spatial metrics.
 """
 
+import math
 import numpy as np
 from collections import defaultdict, deque
+from functools import lru_cache
 from typing import Dict, List, Tuple, Optional
 
+try:
+    from numba import njit
+except ImportError:
+    # Numba is optional; the NumPy update below is used instead
+    njit = None
+
+
+@lru_cache(maxsize=256)
+def _ewma_weights(n: int, alpha: float) -> np.ndarray:
+    """
+    Weights w such that w @ x equals the EWMA of x seeded with x[0]:
+    w[0] = (1 - alpha)^(n - 1), w[i] = alpha * (1 - alpha)^(n - 1 - i).
+    """
+    weights = alpha * (1 - alpha) ** np.arange(n - 1, -1, -1, dtype=np.float64)
+    weights[0] = (1 - alpha) ** (n - 1)
+    weights.flags.writeable = False
+    return weights
+
+
+class _HistoryStore:
+    """
+    Row-per-track history buffers. Each row holds one track's mirrored ring
+    buffers, so the history of many tracks can be updated in one kernel call.
+    """
+    
+    def __init__(self, rows: int, max_history: int):
+        width = 2 * max_history
+        self.max_history = max_history
+        self.centroids = np.empty((rows, width, 2), dtype=np.float64)
+        self.bboxes = np.empty((rows, width, 4), dtype=np.float64)
+        self.frames = np.empty((rows, width), dtype=np.int64)
+        self.speeds = np.empty((rows, width), dtype=np.float64)
+        # Running sum of the last VehicleTrack.SPEED_SUM_WINDOW speeds
+        self.speed_sums = np.zeros(rows, dtype=np.float64)
+        # Per row: head index, stored positions, stored speeds
+        self.state = np.zeros((rows, 3), dtype=np.int64)
+        self.state[:, 0] = max_history - 1
+    
+    def __len__(self) -> int:
+        return len(self.state)
+    
+    def arrays(self) -> Tuple[np.ndarray, ...]:
+        """Buffers in the order the _update_histories kernels take them."""
+        return (self.centroids, self.bboxes, self.frames, self.speeds,
+                self.speed_sums, self.state)
+    
+    def reset_row(self, row: int):
+        """Mark a row as empty so it can be handed to a new track."""
+        self.state[row] = (self.max_history - 1, 0, 0)
+        self.speed_sums[row] = 0.0
+    
+    def resized(self, rows: int) -> '_HistoryStore':
+        """Copy of this store with room for `rows` tracks."""
+        store = _HistoryStore(rows, self.max_history)
+        k = min(rows, len(self))
+        for old, new in zip(self.arrays(), store.arrays()):
+            new[:k] = old[:k]
+        return store
+
+
+def _update_histories_numpy(rows: np.ndarray, bboxes: np.ndarray, frame_idx: int,
+                            sum_window: int, centroids: np.ndarray,
+                            bbox_hist: np.ndarray, frame_hist: np.ndarray,
+                            speed_hist: np.ndarray, speed_sums: np.ndarray,
+                            state: np.ndarray):
+    """
+    Append one detection to each listed track row: centroid, bbox, frame index
+    and pixel speed against the previous centroid, advancing the heads and
+    the running sums of the last `sum_window` speeds.
+    
+    Args:
+        rows (np.ndarray): Store row per detection [K], unique
+        bboxes (np.ndarray): Bounding boxes [K, 4]
+        frame_idx (int): Current frame index
+        sum_window (int): Speeds kept in the running sums (<= max_history)
+        centroids, ..., state: _HistoryStore.arrays()
+    """
+    max_history = centroids.shape[1] // 2
+    heads = (state[rows, 0] + 1) % max_history
+    mirrors = heads + max_history
+    stored = np.minimum(state[rows, 1] + 1, max_history)
+    
+    cxy = np.empty((len(rows), 2), dtype=np.float64)
+    cxy[:, 0] = (bboxes[:, 0] + bboxes[:, 2]) * 0.5
+    cxy[:, 1] = (bboxes[:, 1] + bboxes[:, 3]) * 0.5
+    
+    # Previous centroid is read before the new one can overwrite it
+    moved = np.flatnonzero(stored >= 2)
+    delta = cxy[moved] - centroids[rows[moved], mirrors[moved] - 1]
+    
+    for slots in (heads, mirrors):
+        centroids[rows, slots] = cxy
+        bbox_hist[rows, slots] = bboxes
+        frame_hist[rows, slots] = frame_idx
+    
+    if len(moved):
+        r, head, mirror = rows[moved], heads[moved], mirrors[moved]
+        speeds = np.hypot(delta[:, 0], delta[:, 1])
+        
+        # Speed leaving the summed window (read before it can be overwritten)
+        full = state[r, 2] >= sum_window
+        evicted = np.where(full, speed_hist[r, mirror - sum_window], 0.0)
+        speed_sums[r] += speeds - evicted
+        
+        speed_hist[r, head] = speeds
+        speed_hist[r, mirror] = speeds
+        state[r, 2] = np.minimum(state[r, 2] + 1, max_history)
+        
+        # Once per lap of the buffer, recompute the sums to bound drift
+        lap = head == 0
+        if lap.any():
+            r, mirror = r[lap], mirror[lap]
+            offsets = np.arange(sum_window)
+            recent = speed_hist[r[:, None], mirror[:, None] - offsets]
+            valid = offsets < np.minimum(state[r, 2], sum_window)[:, None]
+            speed_sums[r] = np.where(valid, recent, 0.0).sum(axis=1)
+    
+    state[rows, 0] = heads
+    state[rows, 1] = stored
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _update_histories(rows, bboxes, frame_idx, sum_window, centroids,
+                          bbox_hist, frame_hist, speed_hist, speed_sums, state):
+        """Numba version of _update_histories_numpy (one pass over the rows)."""
+        max_history = centroids.shape[1] // 2
+        for j in range(rows.shape[0]):
+            r = rows[j]
+            head = (state[r, 0] + 1) % max_history
+            mirror = head + max_history
+            cx = (bboxes[j, 0] + bboxes[j, 2]) * 0.5
+            cy = (bboxes[j, 1] + bboxes[j, 3]) * 0.5
+            stored = min(state[r, 1] + 1, max_history)
+            
+            if stored >= 2:
+                dx = cx - centroids[r, mirror - 1, 0]
+                dy = cy - centroids[r, mirror - 1, 1]
+                speed = math.hypot(dx, dy)
+                if state[r, 2] >= sum_window:
+                    speed_sums[r] -= speed_hist[r, mirror - sum_window]
+                speed_sums[r] += speed
+                speed_hist[r, head] = speed
+                speed_hist[r, mirror] = speed
+                state[r, 2] = min(state[r, 2] + 1, max_history)
+                if head == 0:
+                    total = 0.0
+                    for i in range(min(state[r, 2], sum_window)):
+                        total += speed_hist[r, mirror - i]
+                    speed_sums[r] = total
+            
+            for slot in (head, mirror):
+                centroids[r, slot, 0] = cx
+                centroids[r, slot, 1] = cy
+                for c in range(4):
+                    bbox_hist[r, slot, c] = bboxes[j, c]
+                frame_hist[r, slot] = frame_idx
+            
+            state[r, 0] = head
+            state[r, 1] = stored
+else:
+    _update_histories = _update_histories_numpy
+
 
 class VehicleTrack:
     """Store information about a single vehicle track."""
     
+    # Window of recent speeds kept as a running sum (the window used by
+    # draw_tracks, compute_speeds and the TrackManager totals)
+    SPEED_SUM_WINDOW = 5
+    
     def __init__(self, track_id: int, max_history: int = 30):
         """
         Initialize a vehicle track.
@@ -22,21 +191,20 @@ class VehicleTrack:
         self.track_id = track_id
         self.max_history = max_history
         
-        # Position history (centroids)
-        self.centroids = deque(maxlen=max_history)
-        
-        # Bounding box history
-        self.bboxes = deque(maxlen=max_history)
-        
-        # Frame indices
-        self.frame_indices = deque(maxlen=max_history)
-        
-        # Speed history (pixels/frame)
-        self.speeds_px = deque(maxlen=max_history)
+        # History is kept as struct-of-arrays mirrored ring buffers sharing one
+        # head: each row is written twice, max_history apart, so the most
+        # recent rows are always one contiguous slice. The buffers are views
+        # into a _HistoryStore row (a TrackManager binds tracks to its shared
+        # store so all tracks can be updated in one call).
+        self._bind(_HistoryStore(1, max_history), 0)
         
         # Speed history (real-world units if available)
         self.speeds_real = deque(maxlen=max_history)
         
+        # (calibration, total_frames, wx, wy): world position of the newest
+        # centroid, see cache_world_position
+        self._last_world: Optional[Tuple[int, int, float, float]] = None
+        
         # Class information
         self.class_id = None
         self.class_name = None
@@ -58,14 +226,45 @@ class VehicleTrack:
             class_id (int): Object class ID
             class_name (str): Object class name
         """
-        # Compute centroid
-        centroid = self.compute_centroid(bbox)
+        x1, y1, x2, y2 = bbox
+        cx = (x1 + x2) * 0.5
+        cy = (y1 + y2) * 0.5
         
         # Update histories
-        self.centroids.append(centroid)
-        self.bboxes.append(bbox)
-        self.frame_indices.append(frame_idx)
+        max_history = self.max_history
+        state = self._state
+        head = (int(state[0]) + 1) % max_history
+        mirror = head + max_history
+        stored = min(int(state[1]) + 1, max_history)
         
+        # Compute speed if we have previous position
+        if stored >= 2:
+            px, py = self._centroid_arr[mirror - 1].tolist()
+            speed = math.hypot(cx - px, cy - py)
+            sum_window = self._sum_window
+            speed_sum = self._speed_sum
+            if state[2] >= sum_window:
+                speed_sum[0] -= self._speed_arr[mirror - sum_window]
+            speed_sum[0] += speed
+            self._speed_arr[head] = self._speed_arr[mirror] = speed
+            if state[2] < max_history:
+                state[2] += 1
+        
+        self._centroid_arr[head] = self._centroid_arr[mirror] = (cx, cy)
+        self._bbox_arr[head] = self._bbox_arr[mirror] = bbox
+        self._frame_arr[head] = self._frame_arr[mirror] = frame_idx
+        state[0] = head
+        state[1] = stored
+        
+        if head == 0 and state[2]:
+            # Once per lap of the buffer, recompute the speed sum to bound drift
+            self._speed_sum[0] = self.recent_speeds(self._sum_window).sum()
+        
+        self._record_metadata(frame_idx, class_id, class_name)
+    
+    def _record_metadata(self, frame_idx: int, class_id: int = None,
+                         class_name: str = None):
+        """Update class info and frame bookkeeping for a new detection."""
         # Update class info
         if class_id is not None:
             self.class_id = class_id
@@ -77,41 +276,41 @@ class VehicleTrack:
             self.first_frame = frame_idx
         self.last_frame = frame_idx
         self.total_frames += 1
-        
-        # Compute speed if we have previous position
-        if len(self.centroids) >= 2:
-            speed_px = self.compute_speed_pixels()
-            self.speeds_px.append(speed_px)
     
-    @staticmethod
-    def compute_centroid(bbox: List[float]) -> Tuple[float, float]:
-        """
-        Compute centroid from bounding box.
-        
-        Args:
-            bbox (list): [x1, y1, x2, y2]
-        
-        Returns:
-            tuple: (cx, cy)
-        """
-        x1, y1, x2, y2 = bbox
-        cx = (x1 + x2) / 2
-        cy = (y1 + y2) / 2
-        return (cx, cy)
+    def _bind(self, store: _HistoryStore, row: int):
+        """Point this track's history buffers at a row of a history store."""
+        self._store = store
+        self._row = row
+        self._centroid_arr = store.centroids[row]
+        self._bbox_arr = store.bboxes[row]
+        self._frame_arr = store.frames[row]
+        self._speed_arr = store.speeds[row]
+        self._speed_sum = store.speed_sums[row:row + 1]
+        self._state = store.state[row]
+        self._sum_window = min(self.SPEED_SUM_WINDOW, self.max_history)
     
-    @staticmethod
-    def compute_bbox_area(bbox: List[float]) -> float:
-        """
-        Compute bounding box area.
-        
-        Args:
-            bbox (list): [x1, y1, x2, y2]
-        
-        Returns:
-            float: Area in pixels
-        """
-        x1, y1, x2, y2 = bbox
-        return (x2 - x1) * (y2 - y1)
+    def _detach(self):
+        """Copy the history out of a shared store into a private one."""
+        store = _HistoryStore(1, self.max_history)
+        store.centroids[0] = self._centroid_arr
+        store.bboxes[0] = self._bbox_arr
+        store.frames[0] = self._frame_arr
+        store.speeds[0] = self._speed_arr
+        store.speed_sums[0] = self._speed_sum[0]
+        store.state[0] = self._state
+        self._bind(store, 0)
+    
+    @property
+    def _head(self) -> int:
+        return int(self._state[0])
+    
+    @property
+    def _n(self) -> int:
+        return int(self._state[1])
+    
+    @property
+    def _n_speeds(self) -> int:
+        return int(self._state[2])
     
     def compute_speed_pixels(self) -> float:
         """
@@ -120,17 +319,14 @@ class VehicleTrack:
         Returns:
             float: Speed in pixels/frame
         """
-        if len(self.centroids) < 2:
+        if self._n < 2:
             return 0.0
         
-        # Get last two centroids
-        (x1, y1) = self.centroids[-2]
-        (x2, y2) = self.centroids[-1]
+        # Last two centroids
+        (x1, y1), (x2, y2) = self.recent_centroids(2).tolist()
         
         # Euclidean distance
-        distance = np.sqrt((x2 - x1)**2 + (y2 - y1)**2)
-        
-        return distance
+        return math.hypot(x2 - x1, y2 - y1)
     
     def get_average_speed_pixels(self, window: int = 10) -> float:
         """
@@ -142,11 +338,16 @@ class VehicleTrack:
         Returns:
             float: Average speed in pixels/frame
         """
-        if not self.speeds_px:
+        n_speeds = self._n_speeds
+        if not n_speeds:
             return 0.0
         
-        recent_speeds = list(self.speeds_px)[-window:]
-        return np.mean(recent_speeds) if recent_speeds else 0.0
+        # Default-window reads come straight from the running sum
+        if window == self.SPEED_SUM_WINDOW:
+            return float(self._speed_sum[0] / min(n_speeds, window))
+        
+        recent_speeds = self.recent_speeds(window)
+        return np.mean(recent_speeds) if len(recent_speeds) else 0.0
     
     def get_smoothed_speed_pixels(self, alpha: float = 0.3) -> float:
         """
@@ -158,16 +359,12 @@ class VehicleTrack:
         Returns:
             float: Smoothed speed
         """
-        if not self.speeds_px:
+        if not self._n_speeds:
             return 0.0
         
-        speeds = list(self.speeds_px)
-        smoothed = speeds[0]
-        
-        for speed in speeds[1:]:
-            smoothed = alpha * speed + (1 - alpha) * smoothed
-        
-        return smoothed
+        # Closed form of the recursive EWMA: one dot product over the history
+        speeds = self.recent_speeds()
+        return float(_ewma_weights(len(speeds), float(alpha)) @ speeds)
     
     def is_stopped(self, threshold: float = 2.0, window: int = 5) -> bool:
         """
@@ -190,40 +387,156 @@ class VehicleTrack:
         Returns:
             float: Total distance traveled
         """
-        if len(self.centroids) < 2:
+        if self._n < 2:
             return 0.0
         
-        total_distance = 0.0
-        for i in range(1, len(self.centroids)):
-            (x1, y1) = self.centroids[i-1]
-            (x2, y2) = self.centroids[i]
-            distance = np.sqrt((x2 - x1)**2 + (y2 - y1)**2)
-            total_distance += distance
+        return float(np.linalg.norm(np.diff(self.recent_centroids(), axis=0), axis=1).sum())
+    
+    def recent_centroids(self, k: Optional[int] = None) -> np.ndarray:
+        """
+        Get the last k centroids (all stored ones by default), oldest first.
+        
+        Args:
+            k (int): Number of recent centroids
         
-        return total_distance
+        Returns:
+            np.ndarray: Read-only view of shape [min(k, stored), 2]
+        """
+        return self._recent(self._centroid_arr, self._n, k)
+    
+    def cache_world_position(self, calibration: int, wx: float, wy: float):
+        """
+        Remember the world position of the newest centroid.
+        
+        Args:
+            calibration (int): Identifier of the homography that projected it
+            wx (float): World x coordinate
+            wy (float): World y coordinate
+        """
+        self._last_world = (calibration, self.total_frames, wx, wy)
+    
+    def cached_world_position(self, calibration: int) -> Optional[Tuple[float, float]]:
+        """
+        World position of the previous centroid, if it was cached at the
+        track's previous detection under the same homography.
+        
+        Args:
+            calibration (int): Identifier of the current homography
+        
+        Returns:
+            tuple: (wx, wy), or None if there is no usable cached position
+        """
+        entry = self._last_world
+        if (entry is None or entry[0] != calibration
+                or entry[1] != self.total_frames - 1):
+            return None
+        return entry[2], entry[3]
+    
+    def recent_speeds(self, k: Optional[int] = None) -> np.ndarray:
+        """
+        Get the last k pixel speeds (all stored ones by default), oldest first.
+        
+        Args:
+            k (int): Number of recent speeds
+        
+        Returns:
+            np.ndarray: Read-only view of shape [min(k, stored)]
+        """
+        return self._recent(self._speed_arr, self._n_speeds, k)
+    
+    def _recent(self, arr: np.ndarray, stored: int, k: Optional[int]) -> np.ndarray:
+        """Read-only view of the last k of `stored` rows of a history buffer."""
+        n = stored if k is None else max(0, min(k, stored))
+        end = self._head + self.max_history + 1
+        view = arr[end - n:end]
+        view.flags.writeable = False
+        return view
+    
+    @property
+    def centroids(self) -> List[Tuple[float, float]]:
+        """Centroid history as (cx, cy) tuples, oldest first."""
+        return [tuple(c) for c in self.recent_centroids().tolist()]
+    
+    @property
+    def bboxes(self) -> List[List[float]]:
+        """Bounding box history, oldest first."""
+        return self._recent(self._bbox_arr, self._n, None).tolist()
+    
+    @property
+    def frame_indices(self) -> List[int]:
+        """Frame index history, oldest first."""
+        return self._recent(self._frame_arr, self._n, None).tolist()
+    
+    @property
+    def speeds_px(self) -> List[float]:
+        """Pixel speed history, oldest first."""
+        return self.recent_speeds().tolist()
+    
+    @property
+    def num_centroids(self) -> int:
+        """Number of stored centroids."""
+        return self._n
     
     def get_current_bbox(self) -> Optional[List[float]]:
         """Get most recent bounding box."""
-        return list(self.bboxes[-1]) if self.bboxes else None
+        return self._bbox_arr[self._head].tolist() if self._n else None
     
     def get_current_centroid(self) -> Optional[Tuple[float, float]]:
         """Get most recent centroid."""
-        return self.centroids[-1] if self.centroids else None
+        if not self._n:
+            return None
+        cx, cy = self._centroid_arr[self._head].tolist()
+        return (cx, cy)
+
+
+def tracks_to_arrays(tracks: List[VehicleTrack],
+                     window: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Build a struct-of-arrays view of tracks for vectorized metrics.
+    
+    Args:
+        tracks (list): List of VehicleTrack objects
+        window (int): Number of recent speeds per track
+    
+    Returns:
+        tuple: (bboxes [N, 4], speed_windows [N, window]); speed windows are
+            right-aligned and padded with NaN for tracks with fewer speeds
+    """
+    n = len(tracks)
+    bboxes = np.zeros((n, 4), dtype=np.float64)
+    speed_windows = np.full((n, window), np.nan, dtype=np.float64)
+    
+    for i, track in enumerate(tracks):
+        if track.num_centroids:
+            bboxes[i] = track._bbox_arr[track._head]
+        recent = track.recent_speeds(window)
+        if len(recent):
+            speed_windows[i, window - len(recent):] = recent
+    
+    return bboxes, speed_windows
 
 
 class TrackManager:
     """Manage multiple vehicle tracks."""
     
-    def __init__(self, max_age: int = 30, max_history: int = 30):
+    # Recompute the running totals from scratch this often to bound float drift
+    TOTALS_REBUILD_FRAMES = 1000
+    
+    def __init__(self, max_age: int = 30, max_history: int = 30,
+                 speed_window: int = 5, stopped_threshold: float = 2.0):
         """
         Initialize track manager.
         
         Args:
             max_age (int): Maximum frames without detection before removing track
             max_history (int): Maximum history length per track
+            speed_window (int): Recent speeds averaged for the running totals
+            stopped_threshold (float): Speed below which a track counts as stopped
         """
         self.max_age = max_age
         self.max_history = max_history
+        self.speed_window = speed_window
+        self.stopped_threshold = stopped_threshold
         
         # Active tracks
         self.tracks: Dict[int, VehicleTrack] = {}
@@ -237,6 +550,28 @@ class TrackManager:
         # Statistics
         self.total_tracks_created = 0
         self.total_tracks_completed = 0
+        
+        # Cached as_arrays() result, keyed by window; reset whenever tracks change
+        self._arrays_cache: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        
+        # Running totals over active tracks, adjusted only for tracks that change:
+        # track_id -> (average speed, stopped, bbox area)
+        self._track_stats: Dict[int, Tuple[float, bool, float]] = {}
+        self.sum_speed = 0.0
+        self.n_stopped = 0
+        self.sum_area = 0.0
+        self._frames_since_rebuild = 0
+        
+        # Shared history store: every active track is bound to one row, so a
+        # frame's detections are written by a single _update_histories call and
+        # per-track speed means are one gather over the store
+        self._store = _HistoryStore(64, max_history)
+        self._free_rows: List[int] = list(range(63, -1, -1))
+        if njit is not None:
+            # Compile (or load the cached) kernel now rather than on the first frame
+            warm = _HistoryStore(1, max(max_history, 2))
+            _update_histories(np.zeros(1, dtype=np.int64), np.zeros((1, 4)), 0, 1,
+                              *warm.arrays())
     
     def update(self, detections: List[Tuple[int, List[float], int, str]], 
                frame_idx: int):
@@ -248,21 +583,37 @@ class TrackManager:
             frame_idx (int): Current frame index
         """
         detected_ids = set()
+        self._arrays_cache.clear()
         
-        # Update existing tracks or create new ones
+        # Map detections to store rows, creating new tracks as needed
+        updated = []
         for track_id, bbox, class_id, class_name in detections:
             detected_ids.add(track_id)
             
-            if track_id not in self.tracks:
+            track = self.tracks.get(track_id)
+            if track is None:
                 # Create new track
-                self.tracks[track_id] = VehicleTrack(
-                    track_id, max_history=self.max_history
-                )
+                track = VehicleTrack(track_id, max_history=self.max_history)
+                row = self._allocate_row()
+                track._bind(self._store, row)
+                self.tracks[track_id] = track
                 self.total_tracks_created += 1
             
-            # Update track
-            self.tracks[track_id].update(bbox, frame_idx, class_id, class_name)
+            track._record_metadata(frame_idx, class_id, class_name)
             self.track_ages[track_id] = 0
+            updated.append(track)
+        
+        # Write every detection's history (centroid, bbox, speed) in one call,
+        # then refresh the updated tracks' running-total contributions
+        if updated:
+            rows = self._write_histories(updated, detections, frame_idx)
+            speeds = self._recent_speed_means(rows, self.speed_window).tolist()
+            bboxes = self._store.bboxes[rows, self._store.state[rows, 0]]
+            areas = ((bboxes[:, 2] - bboxes[:, 0]) * (bboxes[:, 3] - bboxes[:, 1])).tolist()
+            stopped_threshold = self.stopped_threshold
+            for track, speed, area in zip(updated, speeds, areas):
+                self._set_track_stats(track.track_id,
+                                      (speed, speed < stopped_threshold, area))
         
         # Age tracks that weren't detected
         tracks_to_remove = []
@@ -277,6 +628,92 @@ class TrackManager:
         # Remove aged-out tracks
         for track_id in tracks_to_remove:
             self.remove_track(track_id)
+        
+        self._frames_since_rebuild += 1
+        if self._frames_since_rebuild >= self.TOTALS_REBUILD_FRAMES:
+            self._rebuild_totals()
+    
+    def _allocate_row(self) -> int:
+        """Get a free history store row, growing the store if needed."""
+        if not self._free_rows:
+            size = len(self._store)
+            self._store = self._store.resized(2 * size)
+            for track in self.tracks.values():
+                track._bind(self._store, track._row)
+            self._free_rows = list(range(2 * size - 1, size - 1, -1))
+        row = self._free_rows.pop()
+        self._store.reset_row(row)
+        return row
+    
+    def _write_histories(self, tracks: List[VehicleTrack],
+                         detections: List[Tuple[int, List[float], int, str]],
+                         frame_idx: int) -> np.ndarray:
+        """Append each detection to its track's history in one kernel call; returns the rows."""
+        rows = np.fromiter((track._row for track in tracks), dtype=np.int64,
+                           count=len(tracks))
+        bboxes = np.array([detection[1] for detection in detections], dtype=np.float64)
+        arrays = self._store.arrays()
+        sum_window = min(VehicleTrack.SPEED_SUM_WINDOW, self.max_history)
+        
+        if njit is None and len(np.unique(rows)) != len(rows):
+            # A track detected twice in one frame: the vectorized update needs
+            # unique rows, so apply the detections one at a time
+            for j in range(len(rows)):
+                _update_histories(rows[j:j + 1], bboxes[j:j + 1], frame_idx,
+                                  sum_window, *arrays)
+            return rows
+        
+        _update_histories(rows, bboxes, frame_idx, sum_window, *arrays)
+        return rows
+    
+    def _compute_track_stats(self, track: VehicleTrack) -> Tuple[float, bool, float]:
+        """Get (average speed, stopped, bbox area) for one track."""
+        speed = float(track.get_average_speed_pixels(window=self.speed_window))
+        area = 0.0
+        if track.num_centroids:
+            x1, y1, x2, y2 = track._bbox_arr[track._head].tolist()
+            area = (x2 - x1) * (y2 - y1)
+        return speed, speed < self.stopped_threshold, area
+    
+    def _set_track_stats(self, track_id: int,
+                         stats: Optional[Tuple[float, bool, float]]):
+        """Replace a track's contribution to the running totals (None removes it)."""
+        old = self._track_stats.pop(track_id, None)
+        if old is not None:
+            self.sum_speed -= old[0]
+            self.n_stopped -= old[1]
+            self.sum_area -= old[2]
+        if stats is not None:
+            self._track_stats[track_id] = stats
+            self.sum_speed += stats[0]
+            self.n_stopped += stats[1]
+            self.sum_area += stats[2]
+    
+    def _rebuild_totals(self):
+        """Recompute the running totals from all active tracks."""
+        self._track_stats = {track_id: self._compute_track_stats(track)
+                             for track_id, track in self.tracks.items()}
+        stats = self._track_stats.values()
+        self.sum_speed = sum(s[0] for s in stats)
+        self.n_stopped = sum(s[1] for s in stats)
+        self.sum_area = sum(s[2] for s in stats)
+        self._frames_since_rebuild = 0
+    
+    def get_totals(self, stopped_threshold: Optional[float] = None) -> Tuple[float, int, float]:
+        """
+        Get running totals over active tracks in O(1).
+        
+        Args:
+            stopped_threshold (float): Stopped speed threshold; if it differs
+                from the one the totals were kept with, they are rebuilt for it
+        
+        Returns:
+            tuple: (sum of average speeds, stopped count, total bbox area)
+        """
+        if stopped_threshold is not None and stopped_threshold != self.stopped_threshold:
+            self.stopped_threshold = stopped_threshold
+            self._rebuild_totals()
+        return self.sum_speed, self.n_stopped, self.sum_area
     
     def remove_track(self, track_id: int):
         """
@@ -288,10 +725,17 @@ class TrackManager:
         if track_id in self.tracks:
             track = self.tracks[track_id]
             track.is_active = False
+            self._arrays_cache.clear()
+            
+            # Archived tracks keep their history; release the store row
+            row = track._row
+            track._detach()
+            self._free_rows.append(row)
             self.completed_tracks.append(track)
             
             del self.tracks[track_id]
             del self.track_ages[track_id]
+            self._set_track_stats(track_id, None)
             
             self.total_tracks_completed += 1
     
@@ -299,6 +743,18 @@ class TrackManager:
         """Get list of all active tracks."""
         return list(self.tracks.values())
     
+    def as_arrays(self, window: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get active tracks as (bboxes [N, 4], speed_windows [N, window]) arrays.
+        Arrays are built once per update and shared by all callers in a frame.
+        Rows follow the order of get_active_tracks().
+        """
+        arrays = self._arrays_cache.get(window)
+        if arrays is None:
+            arrays = tracks_to_arrays(self.get_active_tracks(), window)
+            self._arrays_cache[window] = arrays
+        return arrays
+    
     def get_track(self, track_id: int) -> Optional[VehicleTrack]:
         """Get specific track by ID."""
         return self.tracks.get(track_id)
@@ -307,19 +763,52 @@ class TrackManager:
         """Get number of active tracks."""
         return len(self.tracks)
     
+    def _active_rows(self) -> np.ndarray:
+        """History store rows of the active tracks, in get_active_tracks() order."""
+        return np.fromiter((track._row for track in self.tracks.values()),
+                           dtype=np.int64, count=len(self.tracks))
+    
+    def _recent_speed_means(self, rows: np.ndarray, window: int) -> np.ndarray:
+        """
+        Mean of each listed row's last `window` speeds (0 for tracks without
+        any), gathered from the history store in one vectorized pass.
+        """
+        store = self._store
+        width = min(window, self.max_history)
+        state = store.state[rows]
+        counts = np.minimum(state[:, 2], width)
+        
+        # The default window is kept as running sums; no gather needed
+        if window == VehicleTrack.SPEED_SUM_WINDOW:
+            sums = store.speed_sums[rows]
+            return np.divide(sums, counts, out=np.zeros(len(rows)), where=counts > 0)
+        
+        # Columns of the last `width` slots of each mirrored ring buffer
+        offsets = np.arange(width)
+        cols = (state[:, 0] + self.max_history + 1 - width)[:, None] + offsets
+        recent = store.speeds[rows[:, None], cols]
+        valid = offsets >= (width - counts)[:, None]
+        
+        sums = np.where(valid, recent, 0.0).sum(axis=1)
+        return np.divide(sums, counts, out=np.zeros(len(rows)), where=counts > 0)
+    
     def get_stopped_count(self, threshold: float = 2.0) -> int:
         """Get number of stopped vehicles."""
-        return sum(1 for track in self.tracks.values() 
-                   if track.is_stopped(threshold=threshold))
+        # The running totals already count stopped tracks over the same window
+        if threshold == self.stopped_threshold and self.speed_window == 5:
+            return self.n_stopped
+        
+        # Tracks with no speed yet average 0 and count as stopped when threshold > 0
+        means = self._recent_speed_means(self._active_rows(), 5)
+        return int((means < threshold).sum())
     
     def get_average_speed(self) -> float:
         """Get average speed of all active tracks."""
         if not self.tracks:
             return 0.0
         
-        speeds = [track.get_average_speed_pixels() 
-                  for track in self.tracks.values()]
-        return np.mean(speeds) if speeds else 0.0
+        # Tracks without speeds contribute 0 to the sum but count in the mean
+        return float(self._recent_speed_means(self._active_rows(), 10).sum() / len(self.tracks))
     
     def clear(self):
         """Clear all tracks."""
@@ -363,40 +852,42 @@ def draw_tracks(frame: np.ndarray, tracks: List[VehicleTrack],
     
     annotated = frame.copy()
     
-    for track in tracks:
-        # Draw bounding box
-        bbox = track.get_current_bbox()
-        if bbox:
-            x1, y1, x2, y2 = map(int, bbox)
-            cv2.rectangle(annotated, (x1, y1), (x2, y2), color, thickness)
-        
-        # Draw trail
-        if show_trail and len(track.centroids) > 1:
-            points = list(track.centroids)[-trail_length:]
-            for i in range(1, len(points)):
-                pt1 = tuple(map(int, points[i-1]))
-                pt2 = tuple(map(int, points[i]))
-                cv2.line(annotated, pt1, pt2, color, thickness)
-        
+    # Gather current boxes and centroids of all tracks with a detection
+    drawn = [track for track in tracks if track.num_centroids]
+    if not drawn:
+        return annotated
+    bboxes = np.array([track._bbox_arr[track._head] for track in drawn]).astype(np.int32)
+    centroids = np.array([track._centroid_arr[track._head] for track in drawn]).astype(np.int32)
+    
+    # Draw all bounding boxes in one call (a rectangle is a closed 4-point polyline)
+    x1, y1, x2, y2 = bboxes.T
+    corners = np.stack([x1, y1, x2, y1, x2, y2, x1, y2], axis=1).reshape(-1, 4, 1, 2)
+    cv2.polylines(annotated, list(corners), True, color, thickness)
+    
+    # Draw all trails in one call
+    if show_trail:
+        trails = [track.recent_centroids(trail_length).astype(np.int32).reshape(-1, 1, 2)
+                  for track in drawn if track.num_centroids > 1]
+        if trails:
+            cv2.polylines(annotated, trails, False, color, thickness)
+    
+    for track, (cx, cy) in zip(drawn, centroids.tolist()):
         # Draw centroid
-        centroid = track.get_current_centroid()
-        if centroid:
-            cx, cy = map(int, centroid)
-            cv2.circle(annotated, (cx, cy), 5, color, -1)
-            
-            # Add text annotations
-            text_y = cy - 10
-            
-            if show_id:
-                text = f"ID:{track.track_id}"
-                cv2.putText(annotated, text, (cx + 10, text_y),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
-                text_y -= 20
-            
-            if show_speed:
-                speed = track.get_average_speed_pixels(window=5)
-                text = f"{speed:.1f}px/f"
-                cv2.putText(annotated, text, (cx + 10, text_y),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+        cv2.circle(annotated, (cx, cy), 5, color, -1)
+        
+        # Add text annotations
+        text_y = cy - 10
+        
+        if show_id:
+            text = f"ID:{track.track_id}"
+            cv2.putText(annotated, text, (cx + 10, text_y),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+            text_y -= 20
+        
+        if show_speed:
+            speed = track.get_average_speed_pixels(window=5)
+            text = f"{speed:.1f}px/f"
+            cv2.putText(annotated, text, (cx + 10, text_y),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
     
     return annotated
\ No newline at end of file
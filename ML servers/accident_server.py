@@ -4,11 +4,31 @@ Accident Detection Server
 Serves ML model for accident detection on port 8002
 """
 
+if __name__ == '__main__':
+    # Run directly: hand over to gunicorn before anything below is loaded, so
+    # the model and background threads are created in the worker process
+    # rather than in a master that then forks (see wsgi.serve)
+    from wsgi import serve
+    print("🚀 Starting Accident Detection Server...")
+    print("📍 Port: 8002")
+    print("🔗 Health check: http://localhost:8002/health")
+    print("🎯 Analysis endpoint: POST http://localhost:8002/analyze")
+    print("📄 Legacy predict endpoint: POST http://localhost:8002/predict")
+    serve('accident_server:app', port=8002)
+    raise SystemExit
+
 import cv2
 import numpy as np
-import base64
+import binascii
 import io
 import time
+import queue
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from PIL import Image
@@ -17,6 +37,18 @@ import torch
 from ultralytics import YOLO
 import os
 
+# Per-request errors go through a queue so request threads never block on
+# stderr; a background listener does the writes. Lazy %-formatting skips
+# building messages for filtered levels
+log = logging.getLogger('accident_server')
+log.setLevel(logging.INFO)
+log.propagate = False
+_log_queue = queue.Queue(-1)
+log.addHandler(QueueHandler(_log_queue))
+_log_listener = QueueListener(_log_queue, logging.StreamHandler())
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
 app = Flask(__name__)
 CORS(app)
 
@@ -35,6 +67,12 @@ except Exception as e:
         print(f"❌ Error loading fallback model: {e2}")
         model = None
 
+# Run inference in FP16 on CUDA; CPU inference stays FP32
+USE_HALF = model is not None and torch.cuda.is_available()
+if USE_HALF:
+    model.to('cuda')
+    print("⚡ Using FP16 inference on CUDA")
+
 # Preprocessing function
 def transform_image(image_bytes):
     """Transform image for model input."""
@@ -45,6 +83,36 @@ def transform_image(image_bytes):
     image = Image.open(io.BytesIO(image_bytes)).convert("RGB")  # Ensure image is in RGB format
     return transform(image).unsqueeze(0)  # Add batch dimension
 
+# Micro-batching: concurrent requests are collected for up to BATCH_WINDOW
+# seconds (or BATCH_MAX_SIZE frames) and run through the model in one call
+BATCH_MAX_SIZE = 8
+BATCH_WINDOW = 0.015
+
+# Frames allowed to wait for inference; beyond this /analyze answers 503
+# instead of letting latency grow without bound
+BATCH_QUEUE_SIZE = 64
+
+# Long-side size frames are shrunk to before inference (the model's imgsz)
+MODEL_INPUT_SIZE = 640
+
+# Frames whose dHash differs from the last analyzed frame by at most this many
+# bits are treated as duplicates and get the cached result, as long as that
+# result is under REUSE_MAX_AGE seconds old
+SKIP_HASH_DISTANCE = 5
+REUSE_MAX_AGE = 5.0
+
+# LRU of results keyed by exact frame dHash, for scenes that recur after other
+# frames in between; entries older than RESULT_CACHE_TTL seconds are re-analyzed
+RESULT_CACHE_SIZE = 1024
+RESULT_CACHE_TTL = 5.0
+
+def _frame_dhash(frame):
+    """64-bit difference hash of a BGR frame (8x9 grayscale gradient signs)."""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    resized = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = resized[:, 1:] > resized[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
 class AccidentAnalyzer:
     """Real-time accident detection analyzer."""
     
@@ -53,69 +121,242 @@ class AccidentAnalyzer:
         self.confidence = 0.0
         self.last_analysis = time.time()
         self.detected_objects = []
+        self.object_count = 0
         self.risk_level = "LOW"
+        
+        # Last analyzed frame's (shape, hash, result), for skipping near-duplicates;
+        # published as one tuple so concurrent requests never mix two frames
+        self._last = None
+        
+        # dHash -> (frame shape, analysis time, result), least recently used first
+        self._result_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._cache_lookups = 0
+        self._cache_hits = 0
+        
+        # Lower-cased class names and the ids of accident/risk classes, resolved once
+        self._class_names = {}
+        self._accident_class_ids = np.empty(0, dtype=int)
+        self._high_risk_ids = frozenset()
+        self._risk_class_ids = np.empty(0, dtype=int)
+        self._stop_vehicle_ids = np.empty(0, dtype=int)
+        if model is not None:
+            self._class_names = {i: n.lower() for i, n in model.names.items()}
+            
+            def ids_matching(words):
+                return np.array([i for i, n in self._class_names.items()
+                                 if any(w in n for w in words)], dtype=int)
+            
+            self._accident_class_ids = ids_matching(
+                ['accident', 'crash', 'collision', 'damage', 'incident'])
+            high_risk_ids = ids_matching(['accident', 'crash', 'collision'])
+            self._high_risk_ids = frozenset(high_risk_ids.tolist())
+            self._risk_class_ids = np.union1d(
+                high_risk_ids, ids_matching(['damage', 'broken', 'stopped']))
+            self._stop_vehicle_ids = ids_matching(['car', 'truck', 'bus'])
+        
+        # Per-thread resize output buffer, reused while the frame size is unchanged
+        self._buffers = threading.local()
+        
+        # Queue of (frame, future) pairs drained by the batching worker
+        self._queue = queue.Queue(maxsize=BATCH_QUEUE_SIZE)
+        if model is not None:
+            threading.Thread(target=self._batch_worker, daemon=True).start()
+    
+    def _batch_worker(self):
+        """Run queued frames through the model in batches and resolve their futures."""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + BATCH_WINDOW
+            while len(batch) < BATCH_MAX_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            # Frames whose request gave up waiting are dropped unread
+            batch = [(frame, future) for frame, future in batch
+                     if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            
+            try:
+                results = model([frame for frame, _ in batch], imgsz=MODEL_INPUT_SIZE,
+                                conf=0.25, half=USE_HALF, verbose=False)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+    
+    def _cached_result(self, frame_hash, shape, now):
+        """Return the unexpired cached result for a frame hash, or None."""
+        with self._cache_lock:
+            self._cache_lookups += 1
+            entry = self._result_cache.get(frame_hash)
+            if entry is None:
+                return None
+            cached_shape, analyzed_at, result = entry
+            if cached_shape != shape or now - analyzed_at > RESULT_CACHE_TTL:
+                return None
+            self._result_cache.move_to_end(frame_hash)
+            self._cache_hits += 1
+            return result
+    
+    def cache_stats(self):
+        """Size and hit rate of the result cache."""
+        with self._cache_lock:
+            return {
+                'size': len(self._result_cache),
+                'lookups': self._cache_lookups,
+                'hit_rate': self._cache_hits / self._cache_lookups if self._cache_lookups else 0.0
+            }
+    
+    def _cache_result(self, frame_hash, shape, result, now):
+        """Insert a result into the LRU cache, evicting the oldest entry if full."""
+        with self._cache_lock:
+            self._result_cache[frame_hash] = (shape, now, result)
+            self._result_cache.move_to_end(frame_hash)
+            if len(self._result_cache) > RESULT_CACHE_SIZE:
+                self._result_cache.popitem(last=False)
     
-    def analyze_frame(self, frame_b64):
-        """Analyze a single frame for accidents."""
+    def _resize_for_model(self, frame):
+        """Shrink a frame so its long side is MODEL_INPUT_SIZE.
+        
+        The output is written into a buffer owned by the calling request
+        thread; it stays untouched until that thread's inference returns.
+        
+        Returns:
+            Tuple of (resized frame, scale factor applied)
+        """
+        h0, w0 = frame.shape[:2]
+        scale = min(1.0, MODEL_INPUT_SIZE / max(h0, w0))
+        if scale >= 1.0:
+            return frame, 1.0
+        
+        out_shape = (round(h0 * scale), round(w0 * scale), frame.shape[2])
+        buf = getattr(self._buffers, 'resize', None)
+        if buf is None or buf.shape != out_shape:
+            buf = np.empty(out_shape, dtype=np.uint8)
+            self._buffers.resize = buf
+        cv2.resize(frame, (out_shape[1], out_shape[0]), dst=buf,
+                   interpolation=cv2.INTER_LINEAR)
+        return buf, scale
+    
+    def _release_buffers(self):
+        """Stop reusing this thread's frame buffers, which the worker may still read."""
+        self._buffers.resize = None
+    
+    def _infer(self, frame):
+        """Queue a frame for batched inference and wait for its result."""
+        future = Future()
+        self._queue.put_nowait((frame, future))
+        try:
+            return [future.result(timeout=5)]
+        except FutureTimeoutError:
+            # The frame may be a reused buffer: a queued frame is withdrawn, one
+            # already in a running batch is left to the worker
+            if not future.cancel():
+                self._release_buffers()
+            raise
+    
+    def analyze_frame(self, frame_data):
+        """Analyze a single frame (raw image bytes or base64 string) for accidents."""
         try:
-            # Decode base64 image
-            image_data = base64.b64decode(frame_b64.split(',')[1] if ',' in frame_b64 else frame_b64)
-            image = Image.open(io.BytesIO(image_data)).convert('RGB')
-            frame = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+            if isinstance(frame_data, (bytes, bytearray)):
+                image_data = frame_data
+            else:
+                # Decode base64 image, slicing off any data URL prefix without a split copy;
+                # a2b_base64 reads the ASCII str directly, where b64decode first
+                # copies it to bytes
+                comma = frame_data.find(',')
+                image_data = binascii.a2b_base64(frame_data[comma + 1:] if comma >= 0 else frame_data)
+            
+            # Decode straight to BGR in one allocation
+            frame = cv2.imdecode(np.frombuffer(image_data, np.uint8), cv2.IMREAD_COLOR)
+            if frame is None:
+                raise ValueError("Could not decode image")
             
             if model is None:
                 return self._mock_analysis()
             
+            # Near-duplicate of the last analyzed frame: reuse its result while
+            # it is fresh (its timestamp is when inference ran)
+            frame_hash = _frame_dhash(frame)
+            now = time.time()
+            last = self._last
+            if last is not None:
+                last_shape, last_hash, last_result = last
+                if (frame.shape == last_shape and
+                        now - last_result['timestamp'] < REUSE_MAX_AGE and
+                        bin(frame_hash ^ last_hash).count('1') <= SKIP_HASH_DISTANCE):
+                    self.last_analysis = now
+                    return dict(last_result, timestamp=now)
+            
+            # Same scene seen recently, even if not the last frame
+            cached = self._cached_result(frame_hash, frame.shape, now)
+            if cached is not None:
+                self.last_analysis = now
+                return dict(cached, timestamp=now)
+            
+            # Shrink to the model input size once here instead of inside the model;
+            # boxes are scaled back to original frame coordinates below
+            frame_in, scale = self._resize_for_model(frame)
+            
             # Perform detection
-            results = model(frame, conf=0.25, verbose=False)
+            results = self._infer(frame_in)
             
             accident_detected = False
             confidence = 0.0
             detected_objects = []
             risk_level = "LOW"
+            class_ids = np.empty(0, dtype=int)
+            confs = np.empty(0)
             
             if results and len(results) > 0:
                 result = results[0]
                 if result.boxes is not None:
+                    # One device-to-host copy per tensor for all boxes
                     boxes = result.boxes
+                    class_ids = boxes.cls.cpu().numpy().astype(int)
+                    confs = boxes.conf.cpu().numpy()
+                    xyxy = boxes.xyxy.cpu().numpy() / scale
+                    
+                    # Check for accident-related objects
+                    accident_related = np.isin(class_ids, self._accident_class_ids)
+                    flagged = accident_related | (confs > 0.7)
+                    if flagged.any():
+                        accident_detected = True
+                        confidence = max(confidence, float(confs[flagged].max()))
                     
-                    for box in boxes:
-                        # Get detection details
-                        xyxy = box.xyxy[0].cpu().numpy()
-                        conf = float(box.conf.item())
-                        class_id = int(box.cls.item())
-                        class_name = model.names[class_id].lower()
-                        
-                        # Check for accident-related objects
-                        is_accident_related = any(keyword in class_name for keyword in [
-                            'accident', 'crash', 'collision', 'damage', 'incident'
-                        ])
-                        
-                        if is_accident_related or conf > 0.7:
-                            accident_detected = True
-                            confidence = max(confidence, conf)
-                        
-                        # Determine risk level based on detected objects
-                        if any(risk_word in class_name for risk_word in ['accident', 'crash', 'collision']):
-                            risk_level = "HIGH"
-                        elif any(danger_word in class_name for danger_word in ['damage', 'broken', 'stopped']):
-                            risk_level = "MEDIUM"
-                        
-                        detected_objects.append({
-                            'class': class_name,
+                    # Risk level is set by the last box whose class carries a risk word
+                    risky = np.flatnonzero(np.isin(class_ids, self._risk_class_ids))
+                    if risky.size:
+                        last_class = class_ids[risky[-1]]
+                        risk_level = "HIGH" if last_class in self._high_risk_ids else "MEDIUM"
+                    
+                    detected_objects = [
+                        {
+                            'class': self._class_names[class_id],
                             'confidence': conf,
-                            'bbox': xyxy.tolist(),
+                            'bbox': bbox,
                             'is_accident_related': is_accident_related
-                        })
+                        }
+                        for class_id, conf, bbox, is_accident_related in zip(
+                            class_ids.tolist(), confs.tolist(), xyxy.tolist(), accident_related.tolist())
+                    ]
             
             # If no specific accident objects detected, check for unusual patterns
             if not accident_detected and len(detected_objects) > 0:
                 # Check for stopped vehicles (potential accidents)
-                stopped_vehicles = 0
-                for obj in detected_objects:
-                    if any(vehicle in obj['class'] for vehicle in ['car', 'truck', 'bus']) and obj['confidence'] > 0.5:
-                        # Simple heuristic: if there are many vehicles stopped, consider it risky
-                        stopped_vehicles += 1
+                # Simple heuristic: if there are many vehicles stopped, consider it risky
+                stopped_vehicles = int(np.count_nonzero(
+                    np.isin(class_ids, self._stop_vehicle_ids) & (confs > 0.5)))
                 
                 if stopped_vehicles >= 3:  # Threshold for potential accident
                     risk_level = "MEDIUM"
@@ -123,12 +364,13 @@ class AccidentAnalyzer:
                     confidence = 0.6
             
             # Store results
+            now = time.time()
             analysis_result = {
                 'accident_detected': accident_detected,
                 'confidence': round(confidence, 3),
                 'risk_level': risk_level,
                 'detected_objects': detected_objects,
-                'timestamp': time.time(),
+                'timestamp': now,
                 'object_count': len(detected_objects)
             }
             
@@ -136,12 +378,17 @@ class AccidentAnalyzer:
             self.confidence = confidence
             self.risk_level = risk_level
             self.detected_objects = detected_objects
-            self.last_analysis = time.time()
+            self.object_count = len(detected_objects)
+            self.last_analysis = now
+            self._last = (frame.shape, frame_hash, analysis_result)
+            self._cache_result(frame_hash, frame.shape, analysis_result, now)
             
             return analysis_result
             
+        except queue.Full:
+            raise
         except Exception as e:
-            print(f"❌ Error analyzing frame for accidents: {e}")
+            log.exception("❌ Error analyzing frame for accidents: %s", e)
             return self._mock_analysis()
     
     def _mock_analysis(self):
@@ -195,7 +442,8 @@ def health():
     return jsonify({
         'status': 'healthy',
         'last_analysis': accident_analyzer.last_analysis,
-        'model_loaded': model is not None
+        'model_loaded': model is not None,
+        'result_cache': accident_analyzer.cache_stats()
     })
 
 @app.route('/predict', methods=['POST'])
@@ -208,17 +456,20 @@ def predict():
         file = request.files['file']
         img_bytes = file.read()
         
-        # Convert to base64 for consistent processing
-        img_base64 = base64.b64encode(img_bytes).decode('utf-8')
-        result = accident_analyzer.analyze_frame(img_base64)
+        result = accident_analyzer.analyze_frame(img_bytes)
         
         return jsonify({
             'success': True,
             'prediction': result
         })
         
+    except queue.Full:
+        return jsonify({
+            'success': False,
+            'error': 'Inference queue is full, retry shortly'
+        }), 503
     except Exception as e:
-        print(f"❌ Error in /predict: {e}")
+        log.error("❌ Error in /predict: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -228,12 +479,21 @@ def predict():
 def analyze_accident():
     """Analyze image for accident detection."""
     try:
-        data = request.get_json()
-        
-        if not data or 'image' not in data:
-            return jsonify({'error': 'No image data provided'}), 400
-        
-        image_data = data['image']
+        # Raw image bytes skip base64 entirely: a multipart 'file'/'image' field
+        # or an application/octet-stream body
+        upload = request.files.get('file') or request.files.get('image')
+        if upload is not None:
+            image_data = upload.read()
+        elif request.mimetype == 'application/octet-stream':
+            image_data = request.get_data(cache=False)
+        else:
+            # Deprecated: base64 image inside a JSON body, kept for older clients
+            data = request.get_json()
+            
+            if not data or 'image' not in data:
+                return jsonify({'error': 'No image data provided'}), 400
+            
+            image_data = data['image']
         
         # Analyze the frame
         result = accident_analyzer.analyze_frame(image_data)
@@ -243,8 +503,13 @@ def analyze_accident():
             'analysis': result
         })
         
+    except queue.Full:
+        return jsonify({
+            'success': False,
+            'error': 'Inference queue is full, retry shortly'
+        }), 503
     except Exception as e:
-        print(f"❌ Error in /analyze: {e}")
+        log.error("❌ Error in /analyze: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -257,7 +522,7 @@ def status():
         'accident_detected': accident_analyzer.accident_detected,
         'confidence': accident_analyzer.confidence,
         'risk_level': accident_analyzer.risk_level,
-        'object_count': len(accident_analyzer.detected_objects),
+        'object_count': accident_analyzer.object_count,
         'last_analysis': accident_analyzer.last_analysis
     })
 
@@ -272,11 +537,3 @@ def switch_model():
         'message': f'Switched to {model_name} model',
         'current_model': 'accident_detection'
     })
-
-if __name__ == '__main__':
-    print("🚀 Starting Accident Detection Server...")
-    print("📍 Port: 8002")
-    print("🔗 Health check: http://localhost:8002/health")
-    print("🎯 Analysis endpoint: POST http://localhost:8002/analyze")
-    print("📄 Legacy predict endpoint: POST http://localhost:8002/predict")
-    app.run(host='0.0.0.0', port=8002, debug=False)
\ No newline at end of file
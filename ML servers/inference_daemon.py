@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Shared Inference Daemon
+Holds the single traffic model (and its TensorRT engine / CUDA context) for
+multi-worker deployments, so each gunicorn worker does not load its own copy.
+
+    python inference_daemon.py /tmp/traffic_infer.sock
+    INFERENCE_SOCKET=/tmp/traffic_infer.sock \
+        gunicorn -w 4 -k gthread --threads 8 -b 0.0.0.0:8001 wsgi:traffic_app
+
+Workers stay CPU-only HTTP frontends: they decode and resize frames, send the
+model-sized frame over the UNIX socket and get back an (N, 6) float32 array of
+[x1, y1, x2, y2, confidence, class_id] rows. Frames from all workers go through
+the daemon's batching worker together. UNIX sockets make this POSIX-only, as
+is gunicorn itself.
+
+Wire format (big-endian):
+    on connect:  daemon -> u32 length + JSON {class id: name}
+    per frame:   worker -> u32 height, u32 width, u32 channels + uint8 pixels
+                 daemon -> u32 row count + float32 rows, or ERROR_COUNT on failure
+"""
+
+import json
+import logging
+import os
+import socket
+import struct
+import sys
+import threading
+
+import numpy as np
+
+FRAME_HEADER = struct.Struct('!III')
+COUNT_HEADER = struct.Struct('!I')
+# Row count sent in place of detections when inference failed
+ERROR_COUNT = 0xFFFFFFFF
+DETECTION_WIDTH = 6
+
+# traffic_server's logger, set up with its queue handler once traffic_server is imported
+log = logging.getLogger('traffic_server')
+
+
+def _recv_exact(sock, n, eof_ok=False):
+    """Read exactly n bytes.
+    
+    Returns None if eof_ok and the peer closed before sending anything;
+    raises ConnectionError if it closed at any other point.
+    """
+    buf = bytearray(n)
+    view = memoryview(buf)
+    while view:
+        read = sock.recv_into(view)
+        if read == 0:
+            if eof_ok and len(view) == n:
+                return None
+            raise ConnectionError("Inference socket closed mid-message")
+        view = view[read:]
+    return buf
+
+
+def send_json(sock, obj):
+    data = json.dumps(obj).encode()
+    sock.sendall(COUNT_HEADER.pack(len(data)) + data)
+
+
+def recv_json(sock):
+    header = _recv_exact(sock, COUNT_HEADER.size)
+    return json.loads(_recv_exact(sock, COUNT_HEADER.unpack(header)[0]))
+
+
+def send_frame(sock, frame):
+    frame = np.ascontiguousarray(frame, dtype=np.uint8)
+    sock.sendall(FRAME_HEADER.pack(*frame.shape))
+    sock.sendall(frame.data)
+
+
+def recv_frame(sock):
+    """Read one frame, or return None when the worker disconnected."""
+    header = _recv_exact(sock, FRAME_HEADER.size, eof_ok=True)
+    if header is None:
+        return None
+    shape = FRAME_HEADER.unpack(header)
+    pixels = _recv_exact(sock, shape[0] * shape[1] * shape[2])
+    return np.frombuffer(pixels, np.uint8).reshape(shape)
+
+
+def send_detections(sock, detections):
+    if detections is None:
+        sock.sendall(COUNT_HEADER.pack(ERROR_COUNT))
+        return
+    detections = np.ascontiguousarray(detections, dtype='>f4')
+    sock.sendall(COUNT_HEADER.pack(len(detections)) + detections.tobytes())
+
+
+def recv_detections(sock):
+    header = _recv_exact(sock, COUNT_HEADER.size)
+    count = COUNT_HEADER.unpack(header)[0]
+    if count == ERROR_COUNT:
+        raise RuntimeError("Inference failed in the daemon")
+    data = _recv_exact(sock, count * DETECTION_WIDTH * 4)
+    return np.frombuffer(data, '>f4').reshape(count, DETECTION_WIDTH).astype(np.float32)
+
+
+def _serve_connection(conn, analyzer, class_names):
+    """Answer one worker's frames until it disconnects."""
+    with conn:
+        try:
+            send_json(conn, class_names)
+            while True:
+                frame = recv_frame(conn)
+                if frame is None:
+                    return
+                try:
+                    detections = analyzer.detect(frame)
+                except Exception as e:
+                    log.error("❌ Inference error: %s", e)
+                    detections = None
+                send_detections(conn, detections)
+        except OSError as e:
+            # ConnectionError included: the worker went away mid-message
+            log.warning("⚠️  Inference client disconnected: %s", e)
+
+
+def main(path):
+    """Load the traffic model once and serve inference on a UNIX socket."""
+    # This process is the one holding the model
+    os.environ.pop('INFERENCE_SOCKET', None)
+    import traffic_server
+
+    if traffic_server.model is None:
+        log.error("❌ No model loaded, not starting inference daemon")
+        sys.exit(1)
+    class_names = {str(i): n for i, n in traffic_server.model.names.items()}
+
+    if os.path.exists(path):
+        os.unlink(path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen()
+    log.info("🚀 Inference daemon listening on %s", path)
+
+    while True:
+        conn, _ = server.accept()
+        threading.Thread(target=_serve_connection,
+                         args=(conn, traffic_server.traffic_analyzer, class_names),
+                         daemon=True).start()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1] if len(sys.argv) > 1 else '/tmp/traffic_infer.sock')
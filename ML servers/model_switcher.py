@@ -10,8 +10,10 @@ import time
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from threading import Thread
+from concurrent.futures import ThreadPoolExecutor
 import subprocess
 import os
+from wsgi import serve
 
 app = Flask(__name__)
 CORS(app)
@@ -34,6 +36,15 @@ ML_SERVERS = {
     }
 }
 
+# Shared HTTP session so forwarded requests reuse pooled keep-alive connections
+# across the switcher's request threads
+_session = requests.Session()
+_session.mount('http://', requests.adapters.HTTPAdapter(
+    pool_connections=16, pool_maxsize=64, max_retries=0))
+
+# Pool for running the per-server health checks concurrently
+_health_pool = ThreadPoolExecutor(max_workers=8)
+
 # Current active model
 current_model = 'traffic'
 switch_history = []
@@ -42,7 +53,7 @@ def check_server_health(server_name):
     """Check if a server is running and healthy."""
     server = ML_SERVERS[server_name]
     try:
-        response = requests.get(f"{server['url']}/health", timeout=2)
+        response = _session.get(f"{server['url']}/health", timeout=2)
         return response.status_code == 200
     except:
         return False
@@ -50,6 +61,11 @@ def check_server_health(server_name):
 def start_server(server_name):
     """Start a specific ML server."""
     server = ML_SERVERS[server_name]
+    if check_server_health(server_name):
+        server['active'] = True
+        print(f"✅ {server['name']} already running on port {server['port']}")
+        return True
+    
     try:
         script_path = os.path.join(os.path.dirname(__file__), server['script'])
         if os.path.exists(script_path):
@@ -60,6 +76,7 @@ def start_server(server_name):
                 stdout=subprocess.DEVNULL,
                 stderr=subprocess.DEVNULL
             )
+            server['process'] = process
             
             # Wait a moment for server to start
             time.sleep(2)
@@ -82,17 +99,15 @@ def start_server(server_name):
 def stop_server(server_name):
     """Stop a specific ML server."""
     server = ML_SERVERS[server_name]
-    try:
-        # Send termination request to server
-        response = requests.post(f"{server['url']}/shutdown", timeout=1)
-    except:
-        pass  # Server might not respond, continue with cleanup
     
-    # Kill any remaining processes on the port
-    try:
-        os.system(f"taskkill /F /IM python.exe >nul 2>&1")
-    except:
-        pass
+    # Terminate the process this switcher started for the server, if still running
+    process = server.pop('process', None)
+    if process is not None and process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
     
     server['active'] = False
     print(f"🛑 Stopped {server['name']}")
@@ -109,7 +124,8 @@ def switch_model(new_model):
     
     old_model = current_model
     
-    # Start new model server if not already running
+    # Both servers are warm-started and stay resident, so switching is just
+    # repointing current_model; start the server here only if that failed
     if not ML_SERVERS[new_model]['active']:
         if not start_server(new_model):
             return False, f"Failed to start {new_model} model"
@@ -140,13 +156,17 @@ def home():
 @app.route('/status')
 def status():
     """Get current system status."""
+    # Ping all servers at once so the wait is the slowest check, not their sum
+    names = list(ML_SERVERS)
+    healths = dict(zip(names, _health_pool.map(check_server_health, names)))
+    
     status_info = {}
     for name, server in ML_SERVERS.items():
         status_info[name] = {
             'name': server['name'],
             'url': server['url'],
             'port': server['port'],
-            'active': check_server_health(name),
+            'active': healths[name],
             'configured_active': server['active']
         }
     
@@ -198,13 +218,20 @@ def analyze():
         
         # Forward request to the appropriate server
         server = ML_SERVERS[current_model]
-        response = requests.post(
+        # Pass the JSON body through as raw bytes in both directions
+        # instead of parsing and re-serializing it
+        response = _session.post(
             f"{server['url']}/analyze",
-            json=request.get_json(),
+            data=request.get_data(),
+            headers={'Content-Type': request.content_type or 'application/json'},
             timeout=10
         )
         
-        return jsonify(response.json())
+        return app.response_class(
+            response.content,
+            status=response.status_code,
+            content_type=response.headers.get('Content-Type', 'application/json')
+        )
         
     except requests.exceptions.RequestException as e:
         return jsonify({
@@ -287,9 +314,17 @@ print(f"📍 Port: 8000")
 print(f"🎯 Switch endpoint: POST http://localhost:8000/switch")
 print(f"📊 Status endpoint: GET http://localhost:8000/status")
 
-# Start default model (traffic) on startup
+# Start all model servers on startup and keep them resident
+def warm_start():
+    """Start all model servers so switching never waits for a model to load."""
+    print("\n🔄 Warm-starting all model servers...")
+    starters = [Thread(target=start_server, args=(name,)) for name in ML_SERVERS]
+    for starter in starters:
+        starter.start()
+    for starter in starters:
+        starter.join()
+
 if __name__ == '__main__':
-    print("\n🔄 Initializing default model (traffic)...")
-    switch_model('traffic')
-    
-    app.run(host='0.0.0.0', port=8000, debug=False)
\ No newline at end of file
+    # Warm start runs in the serving process, which then owns the server
+    # processes stop_server terminates
+    serve('model_switcher:app', port=8000, on_start='warm_start')
@@ -8,24 +8,19 @@ import requests
 import time
 import json
 import base64
-from PIL import Image
-import io
+import cv2
 import numpy as np
 
 def create_test_image():
     """Create a simple test image."""
     # Create a simple test image
     img_array = np.zeros((480, 640, 3), dtype=np.uint8)
-    img_array[100:200, 100:200] = [255, 0, 0]  # Red square
+    img_array[100:200, 100:200] = [0, 0, 255]  # Red square (BGR)
     img_array[250:350, 400:500] = [0, 255, 0]  # Green square
     
-    # Convert to PIL Image
-    img = Image.fromarray(img_array)
-    
-    # Convert to base64
-    buffer = io.BytesIO()
-    img.save(buffer, format='JPEG')
-    img_base64 = base64.b64encode(buffer.getvalue()).decode()
+    # Encode to JPEG and base64 in one step
+    ok, buffer = cv2.imencode('.jpg', img_array)
+    img_base64 = base64.b64encode(buffer.tobytes()).decode()
     
     return f"data:image/jpeg;base64,{img_base64}"
 
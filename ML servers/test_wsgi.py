@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+WSGI Launch Test
+Serves a small app through wsgi.serve and checks a real request is answered
+by a background thread started at import, as the model servers' batching
+workers are
+"""
+
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+import requests
+
+pytest.importorskip('flask')
+pytest.importorskip('gunicorn')
+
+SERVERS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Stand-in for a model server: a worker thread started at import resolves the
+# futures that request threads wait on
+FORK_APP = '''
+import queue
+import threading
+from concurrent.futures import Future
+from flask import Flask
+
+app = Flask(__name__)
+_jobs = queue.Queue()
+
+def _worker():
+    while True:
+        _jobs.get().set_result(threading.active_count())
+
+threading.Thread(target=_worker, daemon=True).start()
+
+@app.route('/work')
+def work():
+    future = Future()
+    _jobs.put(future)
+    return {'threads': future.result(timeout=2)}
+'''
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def test_serve_keeps_import_time_threads(tmp_path):
+    (tmp_path / 'fork_app.py').write_text(FORK_APP)
+    port = _free_port()
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+        [str(tmp_path), SERVERS_DIR, os.environ.get('PYTHONPATH', '')]))
+    server = subprocess.Popen(
+        [sys.executable, '-c', f"from wsgi import serve; serve('fork_app:app', port={port})"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + 20
+        while True:
+            try:
+                response = requests.get(f'http://127.0.0.1:{port}/work', timeout=5)
+                break
+            except requests.ConnectionError:
+                if time.monotonic() > deadline or server.poll() is not None:
+                    raise
+                time.sleep(0.2)
+
+        assert response.status_code == 200
+        assert response.json()['threads'] > 1
+    finally:
+        # SIGINT is gunicorn's quick shutdown; SIGTERM waits for keep-alive clients
+        server.send_signal(signal.SIGINT)
+        server.wait(timeout=10)
@@ -4,117 +4,712 @@ Traffic Congestion Detection Server
 Serves ML model for traffic congestion analysis on port 8001
 """
 
+if __name__ == '__main__':
+    # Run directly: hand over to gunicorn before anything below is loaded, so
+    # the model and background threads are created in the worker process
+    # rather than in a master that then forks (see wsgi.serve)
+    from wsgi import serve
+    print("🚀 Starting Traffic Congestion Detection Server...")
+    print("📍 Port: 8001")
+    print("🔗 Health check: http://localhost:8001/health")
+    print("🎯 Analysis endpoint: POST http://localhost:8001/analyze")
+    serve('traffic_server:app', port=8001)
+    raise SystemExit
+
 import cv2
 import numpy as np
-import base64
-import io
+import binascii
+import json
+import random
 import time
+import queue
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener
+import threading
+import itertools
+from collections import OrderedDict
+from enum import IntEnum
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-from PIL import Image
+import torch
 from ultralytics import YOLO
+try:
+    import tensorrt
+except ImportError:
+    tensorrt = None
+try:
+    from torchvision.io import ImageReadMode, decode_jpeg
+except ImportError:
+    decode_jpeg = None
+try:
+    import orjson
+except ImportError:
+    orjson = None
 import os
+import socket
+import inference_daemon
 import sys
 
 # Add the traffic model directory to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'ML model', 'traffic_congestion', 'traffic_congestion'))
 
+# Per-request errors go through a queue so request threads never block on
+# stderr; a background listener does the writes. Lazy %-formatting skips
+# building messages for filtered levels
+log = logging.getLogger('traffic_server')
+log.setLevel(logging.INFO)
+log.propagate = False
+_log_queue = queue.Queue(-1)
+log.addHandler(QueueHandler(_log_queue))
+_log_listener = QueueListener(_log_queue, logging.StreamHandler())
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
 app = Flask(__name__)
 CORS(app)
 
-# Load the traffic congestion model
+# Traffic-finetuned checkpoint; setting MODEL_SIZE (n, s, m, l or x) serves a
+# stock YOLOv8 of that size instead, e.g. 'n' for CPU or Jetson deployments
 MODEL_PATH = os.path.join('..', 'public', 'models', 'traffic_congestion', 'best.pt')
-try:
-    model = YOLO(MODEL_PATH)
-    print(f"✅ Traffic congestion model loaded: {MODEL_PATH}")
-except Exception as e:
-    print(f"❌ Error loading traffic model: {e}")
-    # Fallback to a basic model if the specific one doesn't exist
+MODEL_SIZE = os.getenv('MODEL_SIZE') or None
+MODEL_SIZES = ('n', 's', 'm', 'l', 'x')
+
+# UNIX socket of a shared inference daemon (see inference_daemon.py); when set,
+# this process loads no model and sends resized frames to the daemon instead
+INFERENCE_SOCKET = os.getenv('INFERENCE_SOCKET') or None
+
+# Micro-batching: concurrent requests are collected for up to BATCH_WINDOW
+# seconds (or BATCH_MAX_SIZE frames) and run through the model in one call
+BATCH_MAX_SIZE = 8
+BATCH_WINDOW = 0.015
+
+# Frames allowed to wait for inference; beyond this /analyze answers 503
+# instead of letting latency grow without bound
+BATCH_QUEUE_SIZE = 64
+
+# Long-side size frames are shrunk to before inference (the model's imgsz)
+MODEL_INPUT_SIZE = 640
+
+def _load_trt_engine(weights_path):
+    """Load the TensorRT FP16 engine for a .pt checkpoint, building it on first use.
+    
+    The engine is written next to the weights and reused on later starts. It is
+    built with a dynamic batch axis up to BATCH_MAX_SIZE so the batching worker
+    can run whole batches through it.
+    """
+    engine_path = os.path.splitext(weights_path)[0] + '.engine'
+    if not os.path.exists(engine_path):
+        print("🔧 Building TensorRT FP16 engine (one-time, may take a few minutes)...")
+        engine_path = YOLO(weights_path).export(
+            format='engine', half=True, dynamic=True,
+            batch=BATCH_MAX_SIZE, imgsz=MODEL_INPUT_SIZE, verbose=False)
+    return YOLO(engine_path, task='detect')
+
+# Dataset used to calibrate and spot-check the INT8 engine, and the largest
+# mAP50 drop versus the PyTorch model accepted before falling back to FP16
+CALIBRATION_DATA = os.path.join(os.path.dirname(__file__), '..', 'ML model',
+                                'traffic_congestion', 'traffic_congestion', 'data', 'data.yaml')
+INT8_MAX_MAP_DROP = 0.02
+
+def _load_int8_engine(weights_path):
+    """Load the TensorRT INT8 engine for a .pt checkpoint, or None if rejected.
+    
+    On first use the engine is calibrated on CALIBRATION_DATA (TensorRT keeps
+    the calibration cache beside it) and validated against the PyTorch model;
+    an engine losing more than INT8_MAX_MAP_DROP mAP50 is discarded and a
+    marker file stops it being rebuilt on every start.
+    """
+    base = os.path.splitext(weights_path)[0]
+    engine_path = base + '.int8.engine'
+    rejected_path = base + '.int8.rejected'
+    if os.path.exists(rejected_path):
+        return None
+    
+    if not os.path.exists(engine_path):
+        print("🔧 Calibrating TensorRT INT8 engine (one-time)...")
+        exported = YOLO(weights_path).export(
+            format='engine', int8=True, data=CALIBRATION_DATA, dynamic=True,
+            batch=BATCH_MAX_SIZE, imgsz=MODEL_INPUT_SIZE, verbose=False)
+        os.replace(exported, engine_path)
+        
+        base_map = YOLO(weights_path).val(data=CALIBRATION_DATA, imgsz=MODEL_INPUT_SIZE,
+                                          verbose=False).box.map50
+        int8_map = YOLO(engine_path, task='detect').val(
+            data=CALIBRATION_DATA, imgsz=MODEL_INPUT_SIZE, batch=1, verbose=False).box.map50
+        print(f"📊 INT8 mAP50 {int8_map:.3f} vs PyTorch {base_map:.3f}")
+        if base_map - int8_map > INT8_MAX_MAP_DROP:
+            os.remove(engine_path)
+            open(rejected_path, 'w').close()
+            return None
+    return YOLO(engine_path, task='detect')
+
+def _load_model(size):
+    """Load the detector and move it to the fastest runtime available.
+    
+    On NVIDIA GPUs with TensorRT installed this is a fused INT8 engine (when a
+    calibration set is available and accuracy holds) or FP16 engine; otherwise
+    the PyTorch model, in FP16 on CUDA. Any engine build/load failure keeps the
+    PyTorch model.
+    
+    Args:
+        size: YOLOv8 size letter, or None for the traffic-finetuned weights
+    
+    Returns:
+        Tuple of (model, use_trt, use_half)
+    """
+    weights = MODEL_PATH if size is None else f'yolov8{size}.pt'
     try:
+        model = YOLO(weights)
+        print(f"✅ Traffic congestion model loaded: {weights}")
+    except Exception as e:
+        if weights == 'yolov8n.pt':
+            raise
+        print(f"❌ Error loading traffic model: {e}")
+        # Fallback to a basic model if the specific one doesn't exist
         model = YOLO('yolov8n.pt')
         print("✅ Fallback to yolov8n.pt")
-    except Exception as e2:
-        print(f"❌ Error loading fallback model: {e2}")
-        model = None
+    
+    use_trt = False
+    if tensorrt is not None and torch.cuda.is_available():
+        weights_path = model.ckpt_path
+        # The calibration set only matches the traffic-finetuned classes
+        if size is None and os.path.exists(CALIBRATION_DATA):
+            try:
+                engine = _load_int8_engine(weights_path)
+                if engine is not None:
+                    model = engine
+                    use_trt = True
+                    print("⚡ Using TensorRT INT8 engine")
+            except Exception as e:
+                print(f"⚠️  INT8 engine unavailable: {e}")
+        if not use_trt:
+            try:
+                model = _load_trt_engine(weights_path)
+                use_trt = True
+                print("⚡ Using TensorRT FP16 engine")
+            except Exception as e:
+                print(f"⚠️  TensorRT engine unavailable, using PyTorch model: {e}")
+    
+    use_half = not use_trt and torch.cuda.is_available()
+    if use_half:
+        model.to('cuda')
+        print("⚡ Using FP16 inference on CUDA")
+    return model, use_trt, use_half
+
+if INFERENCE_SOCKET is not None:
+    print(f"🔌 Using shared inference daemon at {INFERENCE_SOCKET}")
+    model, USE_TRT, USE_HALF = None, False, False
+else:
+    try:
+        model, USE_TRT, USE_HALF = _load_model(MODEL_SIZE)
+    except Exception as e:
+        print(f"❌ Error loading fallback model: {e}")
+        model, USE_TRT, USE_HALF = None, False, False
+
+# Guards swapping the model globals while /switch_model reloads in the background
+_model_lock = threading.Lock()
+# Held by the one reload allowed to run at a time
+_reload_lock = threading.Lock()
+
+def _reload_model(size):
+    """Load a detector of the given size and swap it in once it is ready.
+    
+    Called with _reload_lock held; releases it when done.
+    """
+    global model, USE_TRT, USE_HALF, MODEL_SIZE
+    try:
+        loaded = _load_model(size)
+        with _model_lock:
+            model, USE_TRT, USE_HALF = loaded
+            MODEL_SIZE = size
+        traffic_analyzer.model_changed()
+    except Exception as e:
+        print(f"❌ Error reloading model: {e}")
+    finally:
+        _reload_lock.release()
+
+# Change detection against the last analyzed frame: a frame whose 64x64
+# grayscale thumbnail differs by less than CHANGE_THRESHOLD mean absolute grey
+# levels reuses the last result, as long as that result is under
+# REUSE_MAX_AGE seconds old
+THUMB_SIZE = 64
+CHANGE_THRESHOLD = 2.0
+REUSE_MAX_AGE = 5.0
+
+# LRU of results keyed by exact frame dHash, for scenes that recur after other
+# frames in between; entries older than RESULT_CACHE_TTL seconds are re-analyzed
+RESULT_CACHE_SIZE = 1024
+RESULT_CACHE_TTL = 5.0
+
+def _frame_thumbnail(frame):
+    """Small grayscale thumbnail of a BGR frame for change detection and hashing."""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return cv2.resize(gray, (THUMB_SIZE, THUMB_SIZE), interpolation=cv2.INTER_AREA)
+
+def _frame_dhash(thumb):
+    """64-bit difference hash of a grayscale thumbnail (8x9 gradient signs)."""
+    resized = cv2.resize(thumb, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = resized[:, 1:] > resized[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+# Decode JPEG uploads with nvJPEG on the GPU when torchvision supports it
+USE_NVJPEG = decode_jpeg is not None and torch.cuda.is_available()
+
+# JPEG start-of-frame markers (baseline, progressive, lossless, arithmetic)
+_JPEG_SOF_MARKERS = frozenset((0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+                               0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF))
+# libjpeg scaled-decode flags by reduction factor, largest first. EXIF
+# orientation is ignored so decoded frames stay in the SOF header's (stored)
+# orientation, which the box scaling below relies on
+_REDUCED_DECODE_FLAGS = ((8, cv2.IMREAD_REDUCED_COLOR_8 | cv2.IMREAD_IGNORE_ORIENTATION),
+                         (4, cv2.IMREAD_REDUCED_COLOR_4 | cv2.IMREAD_IGNORE_ORIENTATION),
+                         (2, cv2.IMREAD_REDUCED_COLOR_2 | cv2.IMREAD_IGNORE_ORIENTATION))
+
+def _jpeg_shape(image_data):
+    """Read (height, width, 3) from a JPEG's SOF header, or None if not a JPEG."""
+    if image_data[:2] != b'\xff\xd8':
+        return None
+    i, n = 2, len(image_data)
+    while i + 9 <= n:
+        if image_data[i] != 0xFF:
+            return None
+        marker = image_data[i + 1]
+        if marker == 0xFF:  # fill byte
+            i += 1
+            continue
+        if marker in _JPEG_SOF_MARKERS:
+            height = int.from_bytes(image_data[i + 5:i + 7], 'big')
+            width = int.from_bytes(image_data[i + 7:i + 9], 'big')
+            return height, width, 3
+        i += 2 + int.from_bytes(image_data[i + 2:i + 4], 'big')
+    return None
+
+def _decode_for_model(image_data):
+    """Decode an image on the CPU, letting libjpeg downscale oversized JPEGs.
+    
+    A JPEG at least twice MODEL_INPUT_SIZE on its long side is decoded at 1/2,
+    1/4 or 1/8 scale (the largest that stays at or above MODEL_INPUT_SIZE), which
+    skips most of the IDCT work and the full-size buffer.
+    
+    Returns:
+        Tuple of (BGR frame, original frame shape)
+    """
+    flag = cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION
+    shape = _jpeg_shape(image_data)
+    if shape is not None:
+        long_side = max(shape[:2])
+        for factor, reduced_flag in _REDUCED_DECODE_FLAGS:
+            if long_side >= factor * MODEL_INPUT_SIZE:
+                flag = reduced_flag
+                break
+    frame = cv2.imdecode(np.frombuffer(image_data, np.uint8), flag)
+    if frame is None:
+        raise ValueError("Could not decode image")
+    return frame, shape or frame.shape
+
+# Per-request-thread CUDA stream and pinned host buffer for the nvJPEG path
+_gpu_local = threading.local()
+
+def _decode_jpeg_gpu(image_data):
+    """Decode a JPEG with nvJPEG and shrink it to the model input size on the GPU.
+    
+    Each request thread works on its own CUDA stream, so concurrent uploads
+    decode and copy back in parallel instead of queueing on the default stream.
+    Only the reduced frame is copied back, into a page-locked buffer owned by
+    the thread and reused while the frame size is unchanged.
+    
+    Returns:
+        Tuple of (BGR uint8 frame, scale factor applied, original frame shape),
+        or None if the data is not a JPEG or the GPU decode fails
+    """
+    if image_data[:2] != b'\xff\xd8':
+        return None
+    try:
+        local = _gpu_local
+        if not hasattr(local, 'stream'):
+            local.stream = torch.cuda.Stream()
+            local.pinned = None
+        
+        with torch.cuda.stream(local.stream):
+            rgb = decode_jpeg(torch.frombuffer(bytearray(image_data), dtype=torch.uint8),
+                              mode=ImageReadMode.RGB, device='cuda')
+            h0, w0 = rgb.shape[1:]
+            scale = min(1.0, MODEL_INPUT_SIZE / max(h0, w0))
+            if scale < 1.0:
+                # FP16 halves the intermediate's traffic; bilinear output stays within
+                # [0, 255], so rounding is just +0.5 and truncation, with no clamp
+                rgb = torch.nn.functional.interpolate(
+                    rgb[None].half(), size=(round(h0 * scale), round(w0 * scale)),
+                    mode='bilinear', align_corners=False)[0].add_(0.5).byte()
+            # Channel swap and HWC packing in a single copy on the (small) frame
+            bgr = rgb[[2, 1, 0]].permute(1, 2, 0).contiguous()
+            
+            if local.pinned is None or local.pinned.shape != bgr.shape:
+                local.pinned = torch.empty(bgr.shape, dtype=torch.uint8, pin_memory=True)
+            local.pinned.copy_(bgr, non_blocking=True)
+        local.stream.synchronize()
+        return local.pinned.numpy(), scale, (h0, w0, 3)
+    except RuntimeError:
+        return None
+
+# (max vehicle count, congestion level, assumed average speed), checked in order;
+# LIGHT additionally requires a frame larger than LIGHT_MIN_AREA pixels
+class CongestionLevel(IntEnum):
+    """Congestion levels, kept as small ints and named only in JSON responses."""
+    FREE_FLOW = 0
+    LIGHT = 1
+    MODERATE = 2
+    HEAVY = 3
+    TRAFFIC_JAM = 4
+    UNKNOWN = 5
+
+# Response strings indexed by CongestionLevel
+_LEVEL_NAMES = tuple(level.name for level in CongestionLevel)
+
+CONGESTION_THRESHOLDS = (
+    (0, CongestionLevel.FREE_FLOW, 50.0),
+    (5, CongestionLevel.LIGHT, 35.0),
+    (15, CongestionLevel.MODERATE, 25.0),
+    (30, CongestionLevel.HEAVY, 15.0),
+)
+LIGHT_MIN_AREA = 100000
+
+# Congestion level of the last HISTORY_SIZE analyzed frames, one byte each
+HISTORY_SIZE = 3600
+
+def _classify_congestion(vehicle_count, area):
+    """Map a vehicle count and frame area to (congestion level, average speed)."""
+    for max_count, level, speed in CONGESTION_THRESHOLDS:
+        if vehicle_count <= max_count and (level != CongestionLevel.LIGHT or area > LIGHT_MIN_AREA):
+            return level, speed
+    return CongestionLevel.TRAFFIC_JAM, 5.0
+
+# Columns of the detected_objects array; class_id indexes the response's
+# class_names list
+DETECTION_COLUMNS = ('x1', 'y1', 'x2', 'y2', 'confidence', 'class_id')
+_NO_DETECTIONS = np.empty((0, len(DETECTION_COLUMNS)), np.float32)
+_NO_DETECTIONS.flags.writeable = False
+
+# Canned mock responses for 0..25 vehicles, built once; the mock path only
+# picks one and stamps the time. Mock frames use the real thresholds with no
+# area limit and a speed falling 1.5 km/h per vehicle
+_MOCK_RESPONSES = [
+    {
+        'vehicle_count': vehicle_count,
+        'congestion_level': _LEVEL_NAMES[_classify_congestion(vehicle_count, float('inf'))[0]],
+        'average_speed': round(max(5.0, 50.0 - (vehicle_count * 1.5)), 1),
+        'detected_objects': [],
+        'timestamp': 0.0,
+        'mock_data': True
+    }
+    for vehicle_count in range(26)
+]
 
 class TrafficAnalyzer:
     """Real-time traffic congestion analyzer."""
     
     def __init__(self):
-        self.vehicle_count = 0
-        self.congestion_level = "UNKNOWN"
-        self.average_speed = 0.0
+        # Request threads analyze frames concurrently, so state that must stay
+        # consistent is published as one immutable tuple per assignment:
+        # (vehicle_count, congestion_level, average_speed)
+        self._status = (0, CongestionLevel.UNKNOWN, 0.0)
+        
+        # Ring buffer of CongestionLevel values; next(self._history_index)
+        # hands each request thread its own slot
+        self._history = np.full(HISTORY_SIZE, CongestionLevel.UNKNOWN, dtype=np.uint8)
+        self._history_index = itertools.count()
         self.last_analysis = time.time()
         self.analysis_cache = {}
+        
+        # Last analyzed frame's (shape, thumbnail, result), for skipping unchanged frames
+        self._last = None
+        
+        # dHash -> (frame shape, analysis time, result), least recently used first
+        self._result_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._cache_lookups = 0
+        self._cache_hits = 0
+        
+        # Lower-cased class names and the ids of vehicle classes, resolved per model
+        self._class_names = {}
+        self._class_name_list = []
+        self._vehicle_class_ids = np.empty(0, dtype=int)
+        self.model_changed()
+        
+        # Per-thread resize output buffer, reused while the frame size is unchanged
+        self._buffers = threading.local()
+        
+        # Per-thread connection to the inference daemon, if one is used
+        self._daemon = threading.local()
+        
+        # Queue of (frame, future) pairs drained by the batching worker
+        # (started even without a model, as /switch_model may load one later)
+        self._queue = queue.Queue(maxsize=BATCH_QUEUE_SIZE)
+        if INFERENCE_SOCKET is None:
+            threading.Thread(target=self._batch_worker, daemon=True).start()
+    
+    def model_changed(self):
+        """Resolve class ids for the current model and drop results from the old one."""
+        if model is None:
+            return
+        self._set_classes(model.names)
+    
+    def _set_classes(self, names):
+        """Resolve class ids from a {class id: name} mapping and clear stale results."""
+        class_names = {int(i): n.lower() for i, n in names.items()}
+        self._class_name_list = [class_names[i] for i in sorted(class_names)]
+        self._vehicle_class_ids = np.array(
+            [i for i, n in class_names.items()
+             if any(v in n for v in ['car', 'truck', 'bus', 'motorcycle', 'bicycle'])],
+            dtype=int)
+        self._class_names = class_names
+        
+        self._last = None
+        with self._cache_lock:
+            self._result_cache.clear()
+    
+    def _batch_worker(self):
+        """Run queued frames through the model in batches and resolve their futures."""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + BATCH_WINDOW
+            while len(batch) < BATCH_MAX_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            # Frames whose request gave up waiting are dropped unread
+            batch = [(frame, future) for frame, future in batch
+                     if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            
+            with _model_lock:
+                detector, half = model, USE_HALF
+            try:
+                results = detector([frame for frame, _ in batch], imgsz=MODEL_INPUT_SIZE,
+                                   conf=0.25, half=half, verbose=False)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            
+            # Boxes leave the GPU as one (N, 6) array whose columns are already
+            # in DETECTION_COLUMNS order, so they can also be sent to workers as is
+            for (_, future), result in zip(batch, results):
+                future.set_result(_NO_DETECTIONS if result.boxes is None
+                                  else result.boxes.data.cpu().numpy())
+    
+    @property
+    def vehicle_count(self):
+        return self._status[0]
     
-    def analyze_frame(self, frame_b64):
-        """Analyze a single frame for traffic congestion."""
+    @property
+    def congestion_level(self):
+        return self._status[1]
+    
+    @property
+    def average_speed(self):
+        return self._status[2]
+    
+    def level_counts(self):
+        """Number of recent analyzed frames at each congestion level, by level name."""
+        counts = np.bincount(self._history, minlength=len(CongestionLevel))
+        return {name: int(counts[level]) for level, name in enumerate(_LEVEL_NAMES)
+                if level != CongestionLevel.UNKNOWN}
+    
+    def _cached_result(self, frame_hash, shape, now):
+        """Return the unexpired cached result for a frame hash, or None."""
+        with self._cache_lock:
+            self._cache_lookups += 1
+            entry = self._result_cache.get(frame_hash)
+            if entry is None:
+                return None
+            cached_shape, analyzed_at, result = entry
+            if cached_shape != shape or now - analyzed_at > RESULT_CACHE_TTL:
+                return None
+            self._result_cache.move_to_end(frame_hash)
+            self._cache_hits += 1
+            return result
+    
+    def cache_stats(self):
+        """Size and hit rate of the result cache."""
+        with self._cache_lock:
+            return {
+                'size': len(self._result_cache),
+                'lookups': self._cache_lookups,
+                'hit_rate': self._cache_hits / self._cache_lookups if self._cache_lookups else 0.0
+            }
+    
+    def _cache_result(self, frame_hash, shape, result, now):
+        """Insert a result into the LRU cache, evicting the oldest entry if full."""
+        with self._cache_lock:
+            self._result_cache[frame_hash] = (shape, now, result)
+            self._result_cache.move_to_end(frame_hash)
+            if len(self._result_cache) > RESULT_CACHE_SIZE:
+                self._result_cache.popitem(last=False)
+    
+    def _resize_for_model(self, frame):
+        """Shrink a frame so its long side is MODEL_INPUT_SIZE.
+        
+        The output is written into a buffer owned by the calling request
+        thread; it stays untouched until that thread's inference returns.
+        
+        Returns:
+            Tuple of (resized frame, scale factor applied)
+        """
+        h0, w0 = frame.shape[:2]
+        scale = min(1.0, MODEL_INPUT_SIZE / max(h0, w0))
+        if scale >= 1.0:
+            return frame, 1.0
+        
+        out_shape = (round(h0 * scale), round(w0 * scale), frame.shape[2])
+        buf = getattr(self._buffers, 'resize', None)
+        if buf is None or buf.shape != out_shape:
+            buf = np.empty(out_shape, dtype=np.uint8)
+            self._buffers.resize = buf
+        cv2.resize(frame, (out_shape[1], out_shape[0]), dst=buf,
+                   interpolation=cv2.INTER_LINEAR)
+        return buf, scale
+    
+    def _release_buffers(self):
+        """Stop reusing this thread's frame buffers, which the worker may still read."""
+        self._buffers.resize = None
+        _gpu_local.pinned = None
+    
+    def detect(self, frame):
+        """Run a model-sized frame through the detector.
+        
+        Returns:
+            (N, 6) float32 array of detections in DETECTION_COLUMNS order,
+            in the coordinates of the frame passed in
+        """
+        if INFERENCE_SOCKET is not None:
+            return self._infer_remote(frame)
+        future = Future()
+        self._queue.put_nowait((frame, future))
+        try:
+            return future.result(timeout=5)
+        except FutureTimeoutError:
+            # The frame may be a reused buffer: a queued frame is withdrawn, one
+            # already in a running batch is left to the worker
+            if not future.cancel():
+                self._release_buffers()
+            raise
+    
+    def _infer_remote(self, frame):
+        """Send a frame to the shared inference daemon and wait for its detections."""
+        sock = getattr(self._daemon, 'sock', None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(5)
+            sock.connect(INFERENCE_SOCKET)
+            if not self._class_name_list:
+                self._set_classes(inference_daemon.recv_json(sock))
+            else:
+                inference_daemon.recv_json(sock)
+            self._daemon.sock = sock
         try:
-            # Decode base64 image
-            image_data = base64.b64decode(frame_b64.split(',')[1] if ',' in frame_b64 else frame_b64)
-            image = Image.open(io.BytesIO(image_data)).convert('RGB')
-            frame = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+            inference_daemon.send_frame(sock, frame)
+            return inference_daemon.recv_detections(sock)
+        except (OSError, ConnectionError):
+            # Reconnect on the next request, e.g. after a daemon restart
+            sock.close()
+            self._daemon.sock = None
+            raise
+    
+    def analyze_frame(self, frame_data, now=None):
+        """Analyze a single frame (raw image bytes or base64 string) for traffic congestion.
+        
+        Args:
+            frame_data: Raw image bytes or base64 string
+            now: Request time from time.time(), used for every timestamp of
+                this analysis; read here if not given
+        """
+        if now is None:
+            now = time.time()
+        try:
+            if isinstance(frame_data, (bytes, bytearray)):
+                image_data = frame_data
+            else:
+                # Decode base64 image, slicing off any data URL prefix without a split copy;
+                # a2b_base64 reads the ASCII str directly, where b64decode first
+                # copies it to bytes
+                comma = frame_data.find(',')
+                image_data = binascii.a2b_base64(frame_data[comma + 1:] if comma >= 0 else frame_data)
+            
+            # Decode to BGR at the model input size: nvJPEG on the GPU for JPEGs
+            # when available, otherwise OpenCV then a resize on the CPU. Boxes
+            # are scaled back to original frame coordinates below
+            decoded = _decode_jpeg_gpu(image_data) if USE_NVJPEG else None
+            if decoded is not None:
+                frame_in, scale, frame_shape = decoded
+            else:
+                frame, frame_shape = _decode_for_model(image_data)
+                frame_in, scale = self._resize_for_model(frame)
+                # Fold in any reduction libjpeg applied while decoding
+                scale *= frame.shape[1] / frame_shape[1]
+            
+            if model is None and INFERENCE_SOCKET is None:
+                return self._mock_analysis(now)
+            
+            # Barely changed since the last analyzed frame: reuse its result
+            # while it is fresh (its timestamp is when that frame's request arrived)
+            thumb = _frame_thumbnail(frame_in)
+            last = self._last
+            if last is not None:
+                last_shape, last_thumb, last_result = last
+                if (frame_shape == last_shape and
+                        now - last_result['timestamp'] < REUSE_MAX_AGE and
+                        cv2.norm(thumb, last_thumb, cv2.NORM_L1) < CHANGE_THRESHOLD * thumb.size):
+                    self.last_analysis = now
+                    return dict(last_result, timestamp=now, reused=True)
             
-            if model is None:
-                return self._mock_analysis()
+            # Same scene seen recently, even if not the last frame
+            frame_hash = _frame_dhash(thumb)
+            cached = self._cached_result(frame_hash, frame_shape, now)
+            if cached is not None:
+                self.last_analysis = now
+                return dict(cached, timestamp=now, reused=True)
             
             # Perform detection
-            results = model(frame, conf=0.25, verbose=False)
-            
-            vehicle_count = 0
-            detected_objects = []
-            
-            if results and len(results) > 0:
-                result = results[0]
-                if result.boxes is not None:
-                    boxes = result.boxes
-                    for box in boxes:
-                        # Count vehicles (cars, trucks, buses, motorcycles)
-                        class_id = int(box.cls.item())
-                        class_name = model.names[class_id].lower()
-                        
-                        if any(vehicle_type in class_name for vehicle_type in 
-                               ['car', 'truck', 'bus', 'motorcycle', 'bicycle']):
-                            vehicle_count += 1
-                            
-                            # Get bounding box coordinates
-                            xyxy = box.xyxy[0].cpu().numpy()
-                            confidence = float(box.conf.item())
-                            
-                            detected_objects.append({
-                                'class': class_name,
-                                'confidence': confidence,
-                                'bbox': xyxy.tolist()
-                            })
+            detections = self.detect(frame_in)
+            
+            # Count vehicles (cars, trucks, buses, motorcycles)
+            keep = np.isin(detections[:, 5].astype(int), self._vehicle_class_ids)
+            vehicle_count = int(keep.sum())
+            detected_objects = _NO_DETECTIONS
+            
+            if vehicle_count:
+                # One row per vehicle in DETECTION_COLUMNS order, serialized as is,
+                # with boxes scaled back to original frame coordinates
+                detected_objects = np.array(detections[keep], dtype=np.float32)
+                detected_objects[:, :4] /= scale
+                detected_objects.flags.writeable = False
             
             # Determine congestion level based on vehicle count and area
-            height, width = frame.shape[:2]
+            height, width = frame_shape[:2]
             area = height * width
             
             # Simple congestion calculation
-            if vehicle_count == 0:
-                congestion_level = "FREE_FLOW"
-                average_speed = 50.0
-            elif vehicle_count <= 5 and area > 100000:
-                congestion_level = "LIGHT"
-                average_speed = 35.0
-            elif vehicle_count <= 15:
-                congestion_level = "MODERATE"
-                average_speed = 25.0
-            elif vehicle_count <= 30:
-                congestion_level = "HEAVY"
-                average_speed = 15.0
-            else:
-                congestion_level = "TRAFFIC_JAM"
-                average_speed = 5.0
+            congestion_level, average_speed = _classify_congestion(vehicle_count, area)
             
             # Store results
             analysis_result = {
                 'vehicle_count': vehicle_count,
-                'congestion_level': congestion_level,
+                'congestion_level': _LEVEL_NAMES[congestion_level],
                 'average_speed': average_speed,
                 'detected_objects': detected_objects,
-                'timestamp': time.time(),
+                'detection_columns': DETECTION_COLUMNS,
+                'class_names': self._class_name_list,
+                'timestamp': now,
+                'reused': False,
                 'frame_info': {
                     'width': width,
                     'height': height,
@@ -122,45 +717,38 @@ class TrafficAnalyzer:
                 }
             }
             
-            self.vehicle_count = vehicle_count
-            self.congestion_level = congestion_level
-            self.average_speed = average_speed
-            self.last_analysis = time.time()
+            self._status = (vehicle_count, congestion_level, average_speed)
+            self._history[next(self._history_index) % HISTORY_SIZE] = congestion_level
+            self.last_analysis = now
+            self._last = (frame_shape, thumb, analysis_result)
+            self._cache_result(frame_hash, frame_shape, analysis_result, now)
             
             return analysis_result
             
+        except queue.Full:
+            raise
         except Exception as e:
-            print(f"❌ Error analyzing frame: {e}")
-            return self._mock_analysis()
+            log.exception("❌ Error analyzing frame: %s", e)
+            return self._mock_analysis(now)
     
-    def _mock_analysis(self):
+    def _mock_analysis(self, now):
         """Return mock analysis data for testing."""
-        import random
-        
-        vehicle_count = random.randint(0, 25)
-        congestion_levels = ["FREE_FLOW", "LIGHT", "MODERATE", "HEAVY", "TRAFFIC_JAM"]
-        
-        if vehicle_count == 0:
-            congestion_level = "FREE_FLOW"
-        elif vehicle_count <= 5:
-            congestion_level = "LIGHT"
-        elif vehicle_count <= 15:
-            congestion_level = "MODERATE"
-        elif vehicle_count <= 25:
-            congestion_level = "HEAVY"
-        else:
-            congestion_level = "TRAFFIC_JAM"
-        
-        average_speed = max(5.0, 50.0 - (vehicle_count * 1.5))
-        
-        return {
-            'vehicle_count': vehicle_count,
-            'congestion_level': congestion_level,
-            'average_speed': round(average_speed, 1),
-            'detected_objects': [],
-            'timestamp': time.time(),
-            'mock_data': True
-        }
+        return dict(random.choice(_MOCK_RESPONSES), timestamp=now)
+
+def _fast_jsonify(data):
+    """jsonify() that serializes NumPy arrays, natively with orjson when installed."""
+    if orjson is None:
+        body = json.dumps(data, default=lambda o: o.tolist())
+    else:
+        body = orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY)
+    return app.response_class(body, mimetype='application/json')
+
+def _request_json():
+    """Parse the request body as JSON with orjson when installed."""
+    if orjson is None:
+        return request.get_json()
+    body = request.get_data()
+    return orjson.loads(body) if body else None
 
 # Initialize analyzer
 traffic_analyzer = TrafficAnalyzer()
@@ -179,30 +767,49 @@ def health():
     return jsonify({
         'status': 'healthy',
         'last_analysis': traffic_analyzer.last_analysis,
-        'model_loaded': model is not None
+        'model_loaded': model is not None,
+        'model_size': MODEL_SIZE,
+        'inference_socket': INFERENCE_SOCKET,
+        'result_cache': traffic_analyzer.cache_stats()
     })
 
 @app.route('/analyze', methods=['POST'])
 def analyze_traffic():
     """Analyze image for traffic congestion."""
+    # One clock read stamps everything this request produces
+    now = time.time()
     try:
-        data = request.get_json()
-        
-        if not data or 'image' not in data:
-            return jsonify({'error': 'No image data provided'}), 400
-        
-        image_data = data['image']
+        # Raw image bytes skip base64 entirely: a multipart 'file'/'image' field
+        # or an application/octet-stream body
+        upload = request.files.get('file') or request.files.get('image')
+        if upload is not None:
+            image_data = upload.read()
+        elif request.mimetype == 'application/octet-stream':
+            image_data = request.get_data(cache=False)
+        else:
+            # Deprecated: base64 image inside a JSON body, kept for older clients
+            data = _request_json()
+            
+            if not data or 'image' not in data:
+                return jsonify({'error': 'No image data provided'}), 400
+            
+            image_data = data['image']
         
         # Analyze the frame
-        result = traffic_analyzer.analyze_frame(image_data)
+        result = traffic_analyzer.analyze_frame(image_data, now=now)
         
-        return jsonify({
+        return _fast_jsonify({
             'success': True,
             'analysis': result
         })
         
+    except queue.Full:
+        return jsonify({
+            'success': False,
+            'error': 'Inference queue is full, retry shortly'
+        }), 503
     except Exception as e:
-        print(f"❌ Error in /analyze: {e}")
+        log.error("❌ Error in /analyze: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -211,28 +818,47 @@ def analyze_traffic():
 @app.route('/status')
 def status():
     """Get current traffic status."""
-    return jsonify({
-        'vehicle_count': traffic_analyzer.vehicle_count,
-        'congestion_level': traffic_analyzer.congestion_level,
-        'average_speed': traffic_analyzer.average_speed,
-        'last_analysis': traffic_analyzer.last_analysis
+    vehicle_count, congestion_level, average_speed = traffic_analyzer._status
+    return _fast_jsonify({
+        'vehicle_count': vehicle_count,
+        'congestion_level': _LEVEL_NAMES[congestion_level],
+        'average_speed': average_speed,
+        'last_analysis': traffic_analyzer.last_analysis,
+        'recent_levels': traffic_analyzer.level_counts()
     })
 
 @app.route('/switch_model', methods=['POST'])
 def switch_model():
-    """Switch between models (placeholder for now)."""
-    data = request.get_json()
-    model_name = data.get('model', 'traffic') if data else 'traffic'
+    """Reload the detector at another size in the background.
+    
+    Body: {"size": "n" | "s" | "m" | "l" | "x"}, or {"size": null} for the
+    traffic-finetuned weights. Returns immediately; inference keeps using the
+    current model until the new one (and its TensorRT engine) is ready.
+    Answers 409 while a previous reload is still running.
+    """
+    if INFERENCE_SOCKET is not None:
+        return jsonify({
+            'success': False,
+            'error': 'Model is managed by the inference daemon'
+        }), 409
+    
+    data = request.get_json(silent=True) or {}
+    size = data.get('size')
+    if size is not None and size not in MODEL_SIZES:
+        return jsonify({
+            'success': False,
+            'error': f'Unknown model size: {size}'
+        }), 400
     
+    if not _reload_lock.acquire(blocking=False):
+        return jsonify({
+            'success': False,
+            'error': 'A model reload is already in progress'
+        }), 409
+    threading.Thread(target=_reload_model, args=(size,), daemon=True).start()
     return jsonify({
         'success': True,
-        'message': f'Switched to {model_name} model',
+        'reloading': True,
+        'model_size': size,
         'current_model': 'traffic_congestion'
     })
-
-if __name__ == '__main__':
-    print("🚀 Starting Traffic Congestion Detection Server...")
-    print("📍 Port: 8001")
-    print("🔗 Health check: http://localhost:8001/health")
-    print("🎯 Analysis endpoint: POST http://localhost:8001/analyze")
-    app.run(host='0.0.0.0', port=8001, debug=False)
\ No newline at end of file
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+WSGI entry points for the ML servers.
+
+Each server can be launched under gunicorn with a threaded worker, e.g.:
+
+    gunicorn -w 1 -k gthread --threads 8 -b 0.0.0.0:8002 wsgi:accident_app
+    gunicorn -w 1 -k gthread --threads 8 -b 0.0.0.0:8001 wsgi:traffic_app
+    gunicorn -w 1 -k gthread --threads 8 -b 0.0.0.0:8000 wsgi:switcher_app
+
+A single worker process keeps one copy of each model in memory; the threads
+let request decoding and I/O overlap with inference. Apps are imported lazily
+so only the requested server loads its model.
+"""
+
+import importlib
+import os
+
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError:  # gunicorn is unavailable on Windows
+    BaseApplication = None
+
+# Number of request threads per server
+SERVER_THREADS = 8
+
+# Seconds gunicorn lets a silent worker live before restarting it. The worker
+# loads the model while booting, and a first TensorRT engine build or INT8
+# calibration takes minutes, so the default is 0 (no timeout)
+WORKER_TIMEOUT = int(os.getenv('WORKER_TIMEOUT', '0'))
+
+
+def _load_app(target, on_start=None):
+    """Import a 'module:attribute' app, calling the module's on_start function first."""
+    module_name, app_name = target.split(':')
+    module = importlib.import_module(module_name)
+    if on_start is not None:
+        getattr(module, on_start)()
+    return getattr(module, app_name)
+
+
+def serve(target, port, threads=SERVER_THREADS, on_start=None):
+    """Serve a Flask app with gunicorn+gthread, falling back to Flask's threaded server.
+
+    gunicorn forks its worker from the master process, and a fork keeps only
+    the calling thread. The app is therefore imported by name inside the
+    worker, so its model, CUDA context and background threads (batching
+    worker, log listener) exist in the process that handles requests. The
+    caller must not have imported the server module itself.
+
+    Args:
+        target: App to serve as 'module:attribute', e.g. 'traffic_server:app'
+        port: Port to bind on all interfaces
+        threads: Number of request handling threads
+        on_start: Optional name of a function in the app's module to call in
+            the serving process before it accepts requests
+    """
+    if BaseApplication is None:
+        print("⚠️  gunicorn not available, using Flask's threaded server")
+        app = _load_app(target, on_start)
+        app.run(host='0.0.0.0', port=port, debug=False, threaded=True)
+        return
+
+    class _Server(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f'0.0.0.0:{port}')
+            self.cfg.set('workers', 1)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('threads', threads)
+            self.cfg.set('timeout', WORKER_TIMEOUT)
+
+        def load(self):
+            # Called in the worker, after the fork (preload_app is off)
+            return _load_app(target, on_start)
+
+    _Server().run()
+
+
+def __getattr__(name):
+    if name == 'accident_app':
+        from accident_server import app
+    elif name == 'traffic_app':
+        from traffic_server import app
+    elif name == 'switcher_app':
+        from model_switcher import app
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return app